@@ -0,0 +1,134 @@
+"""Template helpers for the assets produced by `python build.py`.
+
+Every helper falls back to the original file under static/ when the build
+step has not been run, so the site keeps working from a fresh checkout.
+"""
+import hashlib
+import json
+import os
+from typing import Optional
+
+from jinja2 import pass_context
+from markupsafe import Markup, escape
+
+STATIC_DIR = "static"
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+IMAGE_MANIFEST = os.path.join(DIST_DIR, "images.json")
+ASSET_MANIFEST = os.path.join(DIST_DIR, "manifest.json")
+# Content-hashed copies live here; anything under it can be cached forever
+HASHED_DIR = os.path.join(DIST_DIR, "assets")
+# Per-page critical CSS for INLINE_CRITICAL_CSS, named after the page template
+CRITICAL_CSS_DIR = os.path.join(DIST_DIR, "critical")
+
+# Formats offered by <picture>, best compression first. The last one is the <img> fallback.
+IMAGE_FORMATS = ("image/avif", "image/webp", "image/jpeg", "image/png")
+
+_image_manifest: Optional[dict] = None
+_asset_manifest: Optional[dict] = None
+_inline_css = {}
+_build_version: Optional[str] = None
+
+
+def _load_json(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def load_asset_manifest() -> dict:
+    """Load the map of static paths to their content-hashed copies"""
+    global _asset_manifest
+    if _asset_manifest is None:
+        _asset_manifest = _load_json(ASSET_MANIFEST)
+    return _asset_manifest
+
+
+def load_image_manifest() -> dict:
+    """Load the responsive image manifest, or an empty one if images were never built"""
+    global _image_manifest
+    if _image_manifest is None:
+        _image_manifest = _load_json(IMAGE_MANIFEST)
+    return _image_manifest
+
+
+def build_version() -> str:
+    """Fingerprint of the asset build, which changes the URLs and markup pages render"""
+    global _build_version
+    if _build_version is None:
+        state = [load_asset_manifest(), load_image_manifest(), has_asset("dist/tailwind.css")]
+        _build_version = hashlib.sha256(json.dumps(state, sort_keys=True).encode()).hexdigest()[:12]
+    return _build_version
+
+
+def asset_url(path: str) -> str:
+    """Return the URL of a file under static/, preferring its content-hashed copy.
+    e.g. asset_url('styles.css') -> '/static/dist/assets/styles.3f2a1b9c0d.css'
+    """
+    hashed = load_asset_manifest().get(path)
+    return f"/{STATIC_DIR}/{hashed or path}"
+
+
+def has_asset(path: str) -> bool:
+    """Return True if a file under static/ exists, e.g. a build output such as 'dist/tailwind.css'"""
+    return path in load_asset_manifest() or os.path.isfile(os.path.join(STATIC_DIR, path))
+
+
+def inline_css(path: str) -> Markup:
+    """Return the contents of a stylesheet under static/ for inlining into a <style> tag"""
+    if path not in _inline_css:
+        try:
+            with open(os.path.join(STATIC_DIR, path), encoding="utf-8") as f:
+                _inline_css[path] = Markup(f.read().replace("</", "<\\/"))
+        except FileNotFoundError:
+            _inline_css[path] = Markup("")
+    return _inline_css[path]
+
+
+def critical_css_file(template_name: str) -> str:
+    """Path under static/ of the critical CSS built for a page template, e.g. 'dist/critical/index.css'"""
+    stem = os.path.splitext(os.path.basename(template_name))[0]
+    return os.path.relpath(os.path.join(CRITICAL_CSS_DIR, f"{stem}.css"), STATIC_DIR).replace(os.sep, "/")
+
+
+@pass_context
+def critical_css_path(context) -> str:
+    """critical_css_file() of the page being rendered; in base.html the context is still the page's"""
+    return critical_css_file(context.name)
+
+
+def static_url(url: str) -> str:
+    """Map a '/static/...' URL to its content-hashed copy, leaving other URLs untouched"""
+    prefix = f"/{STATIC_DIR}/"
+    return asset_url(url[len(prefix):]) if url.startswith(prefix) else url
+
+
+def _srcset(variants: list) -> str:
+    return ", ".join(f"{static_url(url)} {width}w" for width, url in variants)
+
+
+def picture(src: str, alt: str, sizes: str = "100vw", img_class: str = "", eager: bool = False) -> Markup:
+    """Render a <picture> with AVIF/WebP/JPEG srcsets and explicit dimensions for `src`.
+    Images above the fold should pass eager=True so they are not lazy-loaded.
+    """
+    loading = 'fetchpriority="high"' if eager else 'loading="lazy"'
+    entry = load_image_manifest().get(src)
+    if entry is None:
+        return Markup(
+            f'<img src="{escape(static_url(src))}" alt="{escape(alt)}" class="{escape(img_class)}" {loading} decoding="async">'
+        )
+
+    sources = entry["sources"]
+    formats = [fmt for fmt in IMAGE_FORMATS if fmt in sources]
+    fallback = sources[formats[-1]]
+    parts = ['<picture class="contents">']
+    for fmt in formats[:-1]:
+        parts.append(f'<source type="{fmt}" srcset="{escape(_srcset(sources[fmt]))}" sizes="{escape(sizes)}">')
+    parts.append(
+        f'<img src="{escape(static_url(fallback[-1][1]))}" srcset="{escape(_srcset(fallback))}" sizes="{escape(sizes)}" '
+        f'width="{entry["width"]}" height="{entry["height"]}" alt="{escape(alt)}" class="{escape(img_class)}" '
+        f'{loading} decoding="async">'
+    )
+    parts.append("</picture>")
+    return Markup("".join(parts))
@@ -0,0 +1 @@
+"""Performance measurement scripts for the portfolio app. Run them with `python -m benchmarks.<name>`."""
@@ -0,0 +1,125 @@
+"""Helpers shared by the benchmarks: in-process ASGI requests, a uvicorn server and timed load."""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Awaitable, Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class AsgiResult(NamedTuple):
+    status: Optional[int]
+    size: int  # body bytes
+    first_byte: Optional[float]  # perf_counter() when the first body message arrived
+
+
+async def asgi_request(app, path: str, method: str = "GET", headers: Iterable[Tuple[bytes, bytes]] = (),
+                       body: bytes = b"", client: Tuple[str, int] = ("127.0.0.1", 1234),
+                       scope_app=None) -> AsgiResult:
+    """Drive one request through an ASGI app. Pass `scope_app` (the FastAPI app) when `app` is
+    only part of its stack, such as its router."""
+    headers = [(b"host", b"localhost"), *headers]
+    if body:
+        headers.append((b"content-length", str(len(body)).encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": headers, "client": client, "server": ("localhost", 80),
+    }
+    if scope_app is not None:
+        scope["app"] = scope_app
+    status = None
+    size = 0
+    first_byte = None
+    received = False
+
+    async def receive():
+        # Like a server: deliver the body once, then nothing until the client disconnects
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status, size, first_byte
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            if first_byte is None:
+                first_byte = time.perf_counter()
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return AsgiResult(status, size, first_byte)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(env: dict, port: int, workers: int) -> subprocess.Popen:
+    """Start uvicorn in the background and wait until it accepts connections"""
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+            "--proxy-headers", "--forwarded-allow-ips", "*",
+        ],
+        env={**os.environ, **env},
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start within 30 seconds")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def summarize(timings: List[float], elapsed: float, errors: int, total_bytes: int = 0) -> dict:
+    timings = sorted(timings)
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "rps": len(timings) / elapsed,
+        "mb_s": total_bytes / elapsed / 1e6,
+        "p50_ms": percentile(timings, 0.50) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+    }
+
+
+async def load(send: Callable[[int], Awaitable[Tuple[bool, int]]], requests: int, concurrency: int,
+               offset: int = 0) -> dict:
+    """Call `send(i)` for `requests` consecutive values of i from `concurrency` concurrent clients,
+    timing each call. `send` returns whether the response was as expected and its body size."""
+    timings = []
+    errors = 0
+    total_bytes = 0
+    counter = iter(range(offset, offset + requests))
+
+    async def client():
+        nonlocal errors, total_bytes
+        for i in counter:
+            start = time.perf_counter()
+            ok, size = await send(i)
+            timings.append(time.perf_counter() - start)
+            total_bytes += size
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize(timings, time.perf_counter() - start, errors, total_bytes)
@@ -0,0 +1,159 @@
+"""Throughput of concurrent downloads of the large static files, whole and by byte range.
+
+Usage:
+    python -m benchmarks.downloads [--mode inprocess|uvicorn|both] [--requests 200] [--concurrency 16]
+
+Compares Starlette's FileResponse, which opens the file and reads each chunk on
+a worker thread, with the cached-descriptor path in static_files.py. Each
+download runs `--requests` times from `--concurrency` concurrent clients, and
+the benchmark reports MB/s, requests per second and p50/p95 latency.
+"inprocess" drives the /static mount through ASGI. "uvicorn" starts
+`uvicorn main:app` once per variant and downloads over HTTP with httpx. The
+Starlette variant is selected by setting LARGE_FILE_SIZE beyond every file
+and STAT_CACHE_TTL=0. Its multi-range responses declare a Content-Length one
+byte short, so uvicorn aborts them and they count as errors. Only errors of
+the cached variant make the benchmark exit with status 1.
+"""
+import argparse
+import asyncio
+import os
+import sys
+from typing import Callable, NamedTuple, Optional
+
+os.environ.setdefault("VERCEL", "1")  # Skip .env loading
+
+from benchmarks.common import asgi_request, free_port, load, start_uvicorn  # noqa: E402
+
+
+class Download(NamedTuple):
+    name: str
+    path: str
+    range: Optional[str] = None
+
+
+DOWNLOADS = [
+    Download("resume.pdf", "/static/resume.pdf"),
+    Download("profile.png", "/static/profile.png"),
+    Download("project_llm.png", "/static/project_llm.png"),
+    Download("resume.pdf first 64K", "/static/resume.pdf", "bytes=0-65535"),
+    Download("profile.png resumed", "/static/profile.png", "bytes=500000-"),
+    Download("resume.pdf 2 ranges", "/static/resume.pdf", "bytes=0-1023,100000-165535"),
+]
+
+# name -> settings of static_files selecting the serving path
+VARIANTS = {
+    "starlette": {"LARGE_FILE_SIZE": str(1 << 62), "STAT_CACHE_TTL": "0"},
+    "cached": {"LARGE_FILE_SIZE": str(128 * 1024), "STAT_CACHE_TTL": "1"},
+}
+
+
+def _configure(settings: dict) -> None:
+    import static_files
+
+    static_files.LARGE_FILE_SIZE = int(settings["LARGE_FILE_SIZE"])
+    static_files.STAT_CACHE_TTL = float(settings["STAT_CACHE_TTL"])
+    static_files._stats.clear()
+    static_files._lookups.clear()
+    static_files.open_files.clear()
+
+
+def inprocess_sender() -> Callable:
+    """Return a coroutine function that downloads through the ASGI app and returns (status, bytes)"""
+    import main
+
+    async def download(item: Download) -> tuple:
+        headers = [(b"range", item.range.encode())] if item.range else []
+        result = await asgi_request(main.app, item.path, headers=headers)
+        return result.status, result.size
+
+    return download
+
+
+def uvicorn_sender(client, port: int) -> Callable:
+    """Return a coroutine function that downloads over HTTP and returns (status, bytes)"""
+    import httpx
+
+    async def download(item: Download) -> tuple:
+        headers = {"range": item.range} if item.range else {}
+        size = 0
+        try:
+            async with client.stream("GET", f"http://127.0.0.1:{port}{item.path}", headers=headers) as response:
+                async for chunk in response.aiter_raw():
+                    size += len(chunk)
+        except httpx.HTTPError:
+            return 0, size
+        return response.status_code, size
+
+    return download
+
+
+async def measure(download: Callable, item: Download, requests: int, concurrency: int) -> dict:
+    """Download `item` `requests` times from `concurrency` concurrent clients"""
+    async def send(i: int) -> tuple:
+        status, size = await download(item)
+        return status in (200, 206), size
+
+    return await load(send, requests, concurrency)
+
+
+def report(title: str, results: dict) -> None:
+    print(f"\n{title}")
+    print(f"  {'download':<24}{'variant':>10}{'MB/s':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for name, by_variant in results.items():
+        for variant, r in by_variant.items():
+            print(f"  {name:<24}{variant:>10}{r['mb_s']:10.0f}{r['rps']:10.0f}{r['p50_ms']:10.2f}{r['p95_ms']:10.2f}{r['errors']:8}")
+
+
+async def run_inprocess(requests: int, concurrency: int) -> dict:
+    download = inprocess_sender()
+    results = {item.name: {} for item in DOWNLOADS}
+    for variant, settings in VARIANTS.items():
+        _configure(settings)
+        for item in DOWNLOADS:
+            await measure(download, item, max(requests // 10, 1), concurrency)  # warm up
+            results[item.name][variant] = await measure(download, item, requests, concurrency)
+    return results
+
+
+async def run_uvicorn(requests: int, concurrency: int, workers: int) -> dict:
+    import httpx
+
+    results = {item.name: {} for item in DOWNLOADS}
+    for variant, settings in VARIANTS.items():
+        port = free_port()
+        server = start_uvicorn({"VERCEL": "1", **settings}, port, workers)
+        try:
+            limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+                download = uvicorn_sender(client, port)
+                for item in DOWNLOADS:
+                    await measure(download, item, max(requests // 10, 1), concurrency)
+                    results[item.name][variant] = await measure(download, item, requests, concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn", "both"), default="both")
+    parser.add_argument("--requests", type=int, default=200, help="downloads timed per file and variant")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    args = parser.parse_args()
+
+    failed = False
+    if args.mode in ("inprocess", "both"):
+        results = asyncio.run(run_inprocess(args.requests, args.concurrency))
+        report("In-process (ASGI)", results)
+        failed |= any(by_variant["cached"]["errors"] for by_variant in results.values())
+    if args.mode in ("uvicorn", "both"):
+        results = asyncio.run(run_uvicorn(args.requests, args.concurrency, args.workers))
+        report(f"uvicorn ({args.workers} worker{'s' if args.workers > 1 else ''})", results)
+        failed |= any(by_variant["cached"]["errors"] for by_variant in results.values())
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Per-request overhead of the security headers middleware.
+
+Usage:
+    python -m benchmarks.middleware [--requests 2000]
+
+Drives requests straight through the ASGI interface (no HTTP client or
+server), comparing the app's routes with no middleware, with the pure ASGI
+SecurityHeadersMiddleware, and with the equivalent `@app.middleware("http")`
+(BaseHTTPMiddleware) implementation it replaced.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("VERCEL", "1")  # Skip .env loading
+
+from benchmarks.common import asgi_request  # noqa: E402
+
+PATHS = ("/static/styles.css", "/static/resume.pdf", "/about", "/projects")
+
+
+def _variants() -> dict:
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    import main
+    from middleware import SecurityHeadersMiddleware
+
+    router = main.app.router
+
+    async def add_security_headers(request, call_next):
+        response = await call_next(request)
+        for name, value in SecurityHeadersMiddleware.HEADERS.items():
+            response.headers[name] = value
+        return response
+
+    return {
+        "none": router,
+        "pure ASGI": SecurityHeadersMiddleware(router),
+        "BaseHTTPMiddleware": BaseHTTPMiddleware(router, dispatch=add_security_headers),
+    }
+
+
+async def _request(app, path: str) -> None:
+    import main
+
+    await asgi_request(app, path, scope_app=main.app)
+
+
+async def measure(app, path: str, requests: int) -> float:
+    """Median microseconds per request"""
+    for _ in range(50):
+        await _request(app, path)
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await _request(app, path)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings)
+
+
+async def run(requests: int) -> None:
+    variants = _variants()
+    print(f"{'path':<22}" + "".join(f"{name:>20}" for name in variants) + "   (median us/request)")
+    for path in PATHS:
+        results = [await measure(app, path, requests) for app in variants.values()]
+        print(f"{path:<22}" + "".join(f"{result:20.1f}" for result in results))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests timed per path and variant")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Per-check overhead and multi-worker correctness of the rate limiter storages.
+
+Usage:
+    python -m benchmarks.ratelimit [--checks 5000] [--workers 4] [--redis redis://localhost:6379]
+
+For each storage it times single `hit` checks, then starts several processes
+that hit one shared key at once and verifies that exactly `limit` hits were
+allowed in total. The in-process memory storage is expected to fail that check,
+since each worker process counts on its own.
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+
+def _strategy(uri: str):
+    from limits.storage import storage_from_string
+    from limits.strategies import MovingWindowRateLimiter
+
+    import rate_limit_storage  # noqa: F401 - registers sqlite://
+
+    return MovingWindowRateLimiter(storage_from_string(uri))
+
+
+def measure_overhead(uri: str, checks: int) -> list:
+    """Time `checks` hits spread over many keys, returning per-check latency in microseconds"""
+    from limits import parse
+
+    strategy = _strategy(uri)
+    item = parse("3/minute")
+    timings = []
+    for i in range(checks):
+        start = time.perf_counter()
+        strategy.hit(item, "benchmark", f"10.0.{i // 256 % 256}.{i % 256}")
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def _hammer(uri: str, limit: str, attempts: int, key: str, results) -> None:
+    from limits import parse
+
+    strategy = _strategy(uri)
+    item = parse(limit)
+    results.put(sum(strategy.hit(item, "benchmark", key) for _ in range(attempts)))
+
+
+def shared_allowed(uri: str, workers: int, limit: int = 30, attempts: int = 50) -> int:
+    """Hit one key from several processes at once and return how many hits were allowed in total"""
+    results = multiprocessing.Queue()
+    key = f"shared-{time.time_ns()}"
+    processes = [
+        multiprocessing.Process(target=_hammer, args=(uri, f"{limit}/minute", attempts, key, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return sum(results.get() for _ in processes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", type=int, default=5000, help="hits timed per storage")
+    parser.add_argument("--workers", type=int, default=4, help="processes sharing one key")
+    parser.add_argument("--redis", help="also benchmark this Redis-compatible server, e.g. redis://localhost:6379")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storages = {
+            "memory": "memory://",
+            "sqlite": "sqlite:///" + os.path.join(tmp, "ratelimit.db"),
+        }
+        if args.redis:
+            storages["redis"] = args.redis
+
+        limit = 30
+        print(f"{'storage':<8} {'mean us':>9} {'p50 us':>9} {'p99 us':>9}   allowed/{limit} across {args.workers} workers")
+        for name, uri in storages.items():
+            timings = sorted(measure_overhead(uri, args.checks))
+            allowed = shared_allowed(uri, args.workers, limit=limit)
+            print(
+                f"{name:<8} {statistics.fmean(timings):9.1f} {timings[len(timings) // 2]:9.1f} "
+                f"{timings[int(len(timings) * 0.99)]:9.1f}   {allowed}"
+                + ("" if allowed == limit else "  (limit not shared)")
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Throughput and latency of every route, in-process and over a real uvicorn server.
+
+Usage:
+    python -m benchmarks.routes [--mode inprocess|uvicorn|both] [--requests 500] [--concurrency 8]
+                                [--save baseline.json] [--baseline baseline.json] [--threshold 0.25]
+
+Each route gets `--requests` requests from `--concurrency` concurrent clients
+and reports requests per second and p50/p95/p99 latency. "inprocess" drives
+the ASGI app directly, which isolates the app's own cost. "uvicorn" starts
+`uvicorn main:app` and sends real HTTP requests with httpx, which adds
+parsing, sockets and compression. Contact form posts are delivered to a
+local fake SMTP server (aiosmtpd, see requirements-dev.txt). Each post comes
+from a different client address so the rate limiter lets it through.
+
+--save writes the results as JSON. --baseline compares against a saved file
+and exits with status 1 if a route's p95 latency grew, or its throughput
+fell, by more than --threshold (0.25 = 25%). Differences under
+--min-delta-ms are treated as noise. Baselines are only comparable on the
+same machine.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple
+from urllib.parse import urlencode
+
+from benchmarks.common import asgi_request, free_port, load, start_uvicorn
+
+SECRET_KEY = "benchmark-secret"
+
+
+class Route(NamedTuple):
+    name: str
+    method: str
+    path: str
+    expected_status: int
+
+
+ROUTES = (
+    Route("GET /", "GET", "/", 200),
+    Route("GET /about", "GET", "/about", 200),
+    Route("GET /projects", "GET", "/projects", 200),
+    Route("GET /projects/<slug>", "GET", "/projects/large-language-model-fine-tuning-platform", 200),
+    Route("GET /resources", "GET", "/resources", 200),
+    Route("GET /sitemap.xml", "GET", "/sitemap.xml", 200),
+    Route("GET /contact", "GET", "/contact", 200),
+    Route("POST /contact", "POST", "/contact", 303),
+    Route("GET /static/styles.css", "GET", "/static/styles.css", 200),
+    Route("GET /static/profile.jpeg", "GET", "/static/profile.jpeg", 200),
+    Route("GET /static/resume.pdf", "GET", "/static/resume.pdf", 200),
+)
+
+
+def _environment(tmp: str, smtp_port: int) -> dict:
+    """Settings shared by the benchmark process and the uvicorn server"""
+    return {
+        # Skip .env loading but run as on a server: VERCEL would deliver each email on the request path
+        "DOTENV_PATH": os.devnull,
+        "SECRET_KEY": SECRET_KEY,
+        "SMTP_SERVER": "127.0.0.1",
+        "SMTP_PORT": str(smtp_port),
+        "SMTP_STARTTLS": "false",
+        "SMTP_USERNAME": "benchmark@example.com",
+        "SMTP_PASSWORD": "benchmark",
+        "RECIPIENT_EMAIL": "inbox@example.com",
+        "CONTACT_SPOOL_PATH": os.path.join(tmp, "contact_spool.db"),
+        "RATELIMIT_STORAGE_URI": "memory://",
+    }
+
+
+def start_smtp_server(port: int):
+    """Start a local SMTP server that accepts any login and discards every message"""
+    from aiosmtpd.controller import Controller
+    from aiosmtpd.smtp import AuthResult
+
+    class Sink:
+        received = 0
+
+        async def handle_DATA(self, server, session, envelope):
+            Sink.received += 1
+            return "250 OK"
+
+    controller = Controller(
+        Sink(), hostname="127.0.0.1", port=port, auth_require_tls=False,
+        authenticator=lambda *args: AuthResult(success=True),
+    )
+    controller.start()
+    return controller, Sink
+
+
+def contact_form(i: int) -> bytes:
+    """A valid, unique contact form submission, with a token old enough to pass the 3 second check"""
+    timestamp = str(int(time.time()) - 10)
+    nonce = f"bench{i}"
+    signature = hmac.new(SECRET_KEY.encode(), f"{timestamp}:{nonce}".encode(), hashlib.sha256).hexdigest()
+    return urlencode({
+        "name": "Benchmark",
+        "email": "benchmark@example.com",
+        "subject": f"Benchmark message {i}",
+        "message": "Sent by python -m benchmarks.routes",
+        "form_token": f"{timestamp}:{nonce}:{signature}",
+    }).encode()
+
+
+def client_address(i: int) -> str:
+    """A distinct client IP per request, so the contact rate limit never triggers"""
+    return f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"
+
+
+def inprocess_sender():
+    """Return a coroutine function that drives one request through the ASGI app and returns its status"""
+    import main
+
+    async def send_request(route: Route, i: int) -> int:
+        body = contact_form(i) if route.method == "POST" else b""
+        headers = [(b"accept-encoding", b"gzip, br")]
+        if body:
+            headers.append((b"content-type", b"application/x-www-form-urlencoded"))
+        result = await asgi_request(main.app, route.path, route.method, headers, body, client=(client_address(i), 1234))
+        return result.status
+
+    return send_request
+
+
+def uvicorn_sender(client, port: int):
+    """Return a coroutine function that sends one HTTP request to uvicorn and returns its status"""
+
+    async def send_request(route: Route, i: int) -> int:
+        headers = {"x-forwarded-for": client_address(i), "accept-encoding": "gzip, br"}
+        if route.method == "POST":
+            headers["content-type"] = "application/x-www-form-urlencoded"
+            response = await client.post(f"http://127.0.0.1:{port}{route.path}", content=contact_form(i), headers=headers)
+        else:
+            response = await client.get(f"http://127.0.0.1:{port}{route.path}", headers=headers)
+        return response.status_code
+
+    return send_request
+
+
+async def run_routes(send_request: Callable, requests: int, concurrency: int, warmup: int) -> Dict[str, dict]:
+    results = {}
+    offset = 0
+    for route in ROUTES:
+        async def send(i: int, route: Route = route) -> tuple:
+            return await send_request(route, i) == route.expected_status, 0
+
+        await load(send, warmup, concurrency, offset)
+        offset += warmup
+        results[route.name] = await load(send, requests, concurrency, offset)
+        offset += requests
+    return results
+
+
+async def run_inprocess(requests: int, concurrency: int, warmup: int) -> Dict[str, dict]:
+    """Benchmark the ASGI app inside its lifespan, then let the email worker drain the spool"""
+    import main
+
+    async with main.app.router.lifespan_context(main.app):
+        results = await run_routes(inprocess_sender(), requests, concurrency, warmup)
+        worker = main.get_email_worker()
+        deadline = time.monotonic() + 30
+        while worker.spool.counts().get("pending") and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+    return results
+
+
+async def run_uvicorn(env: dict, requests: int, concurrency: int, warmup: int, workers: int) -> Dict[str, dict]:
+    import httpx
+
+    port = free_port()
+    server = start_uvicorn(env, port, workers)
+    try:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(limits=limits, follow_redirects=False, timeout=30) as client:
+            return await run_routes(uvicorn_sender(client, port), requests, concurrency, warmup)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def print_results(mode: str, results: Dict[str, dict]) -> None:
+    print(f"\n{mode}")
+    print(f"  {'route':<26} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, result in results.items():
+        print(
+            f"  {name:<26} {result['rps']:9.0f} {result['p50_ms']:9.2f} {result['p95_ms']:9.2f} "
+            f"{result['p99_ms']:9.2f} {result['errors']:7d}"
+        )
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """Compare results with a saved baseline, returning a description of every regression"""
+    regressions = []
+    for mode, routes in results.items():
+        for name, result in routes.items():
+            before = baseline.get(mode, {}).get(name)
+            if before is None:
+                continue
+            p95_delta = result["p95_ms"] - before["p95_ms"]
+            if p95_delta > min_delta_ms and result["p95_ms"] > before["p95_ms"] * (1 + threshold):
+                regressions.append(f"{mode} {name}: p95 {before['p95_ms']:.2f} ms -> {result['p95_ms']:.2f} ms")
+            if result["rps"] < before["rps"] * (1 - threshold):
+                regressions.append(f"{mode} {name}: throughput {before['rps']:.0f} -> {result['rps']:.0f} req/s")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn", "both"), default="both")
+    parser.add_argument("--requests", type=int, default=500, help="requests timed per route")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--warmup", type=int, default=50, help="untimed requests per route first")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--save", metavar="FILE", help="write the results as a JSON baseline")
+    parser.add_argument("--baseline", metavar="FILE", help="fail if results regressed against this baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore p95 changes smaller than this")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        smtp_port = free_port()
+        env = _environment(tmp, smtp_port)
+        os.environ.update(env)
+        smtp, sink = start_smtp_server(smtp_port)
+        results = {}
+        try:
+            if args.mode in ("inprocess", "both"):
+                results["inprocess"] = asyncio.run(run_inprocess(args.requests, args.concurrency, args.warmup))
+                print_results("in-process (ASGI)", results["inprocess"])
+            if args.mode in ("uvicorn", "both"):
+                results["uvicorn"] = asyncio.run(
+                    run_uvicorn(env, args.requests, args.concurrency, args.warmup, args.workers)
+                )
+                print_results(f"uvicorn ({args.workers} worker{'s' if args.workers > 1 else ''})", results["uvicorn"])
+        finally:
+            smtp.stop()
+        print(f"\nFake SMTP server received {sink.received} messages")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%} of {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} of {args.baseline}")
+
+    errors = sum(result["errors"] for routes in results.values() for result in routes.values())
+    if errors:
+        print(f"\n{errors} request(s) returned an unexpected status")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
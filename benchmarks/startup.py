@@ -0,0 +1,84 @@
+"""Cold-start profile of the app: import time per module and time to first byte.
+
+Usage:
+    python -m benchmarks.startup [--runs 5] [--top 20] [--path /]
+
+Every run is a fresh interpreter, like a serverless cold start. Run
+`python build.py templates` first to measure with the prebuilt bytecode cache.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in the child interpreter: import the app, then drive one request through
+# the ASGI interface and report when the first body byte was produced.
+_FIRST_REQUEST = r"""
+import asyncio, json, sys, time
+from benchmarks.common import asgi_request
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+result = asyncio.run(asgi_request(main.app, sys.argv[1]))
+print(json.dumps({
+    "status": result.status,
+    "import_ms": (imported - start) * 1000,
+    "first_byte_ms": (result.first_byte - start) * 1000,
+}))
+"""
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("VERCEL", "1")  # Skip .env loading, as on a real cold start
+    return env
+
+
+def import_times() -> list:
+    """Import the app under -X importtime and return (cumulative_us, self_us, module) rows"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, env=_env(), check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+    return rows
+
+
+def first_request(path: str) -> dict:
+    """Time the import and the first request in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", _FIRST_REQUEST, path],
+        capture_output=True, text=True, env=_env(), check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=20, help="modules to list")
+    parser.add_argument("--path", default="/", help="route for the first request")
+    args = parser.parse_args()
+
+    rows = import_times()
+    print(f"Slowest imports (cumulative, self) of {len(rows)} modules:")
+    for cumulative_us, self_us, module in sorted(rows, reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms {self_us / 1000:8.1f} ms  {module}")
+
+    runs = [first_request(args.path) for _ in range(args.runs)]
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    first_byte_ms = statistics.median(run["first_byte_ms"] for run in runs)
+    print(f"\nGET {args.path} -> {runs[0]['status']} (median of {args.runs} cold starts)")
+    print(f"  import main:      {import_ms:8.1f} ms")
+    print(f"  time to 1st byte: {first_byte_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
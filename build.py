@@ -0,0 +1,405 @@
+"""Asset build steps for the portfolio site.
+
+Usage:
+    python build.py images        # Resized AVIF/WebP/JPEG variants of the site images
+    python build.py css           # Compiled, purged and minified Tailwind CSS (needs Node.js)
+    python build.py fingerprint   # Content-hashed copies of static/ plus manifest.json
+    python build.py compress      # Brotli (.br) and gzip (.gz) siblings of compressible files
+    python build.py templates     # Precompiled Jinja bytecode in .jinja_cache/
+    python build.py content       # Parsed content/ files in .content_cache.json
+    python build.py export        # Static HTML export of the page routes into .vercel/output/ (after `vercel build`)
+    python build.py all           # Every step above but export, in order
+    python build.py minify-report # Bytes saved by HTML minification on every page route
+
+Outputs go to static/dist/, .jinja_cache/, .content_cache.json and .vercel/output/, which are not committed. Run the
+build before deploying; the site falls back to the original files when it has
+not been run.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import tempfile
+
+from assets import ASSET_MANIFEST, CRITICAL_CSS_DIR, DIST_DIR, HASHED_DIR, IMAGE_MANIFEST, STATIC_DIR, critical_css_file
+
+TEMPLATES_DIR = "templates"
+VERCEL_CONFIG = "vercel.json"
+# Build Output API directory written by `vercel build`; the export adds its pages and routes to it
+VERCEL_OUTPUT = os.path.join(".vercel", "output")
+EXPORT_DIR = os.path.join(VERCEL_OUTPUT, "static")
+# The function `vercel build` makes of main.py, which the routes in vercel.json point at
+VERCEL_FUNCTION = os.path.join(VERCEL_OUTPUT, "functions", "main.py.func")
+
+# Routes that must stay on the Python function: GET /contact embeds a fresh form token,
+# /metrics reports the live process and /api/projects answers arbitrary queries
+DYNAMIC_ROUTES = {"/contact", "/metrics", "/api/projects"}
+
+# Exported pages whose filtered or paginated views (any of these query parameters) go to the function
+QUERY_ROUTES = {"/projects": ("q", "category", "tag", "page")}
+
+# Override with e.g. TAILWIND_CMD=./tailwindcss to use the standalone CLI instead of npx
+TAILWIND_CMD = os.getenv("TAILWIND_CMD", "npx --yes tailwindcss@3")
+TAILWIND_INPUT = os.path.join("styles", "tailwind.css")
+# Each page's critical CSS covers the page shell (header, nav, footer) plus the page template
+# up to FOLD_MARKER, or all of it when it has none, plus the content files it takes classes from
+# and the markup assets.py writes (picture())
+CRITICAL_CSS_PAGES = {
+    "index.html": (),
+    "about.html": (),
+    "projects.html": (os.path.join("content", "projects.yaml"),),
+    "project.html": (os.path.join("content", "projects.yaml"),),
+    "resources.html": (),
+    "contact.html": (),
+}
+FOLD_MARKER = "{# end of first screen"
+
+# Widths generated for every image, capped at the source width
+IMAGE_WIDTHS = (160, 320, 480, 640, 960, 1280)
+IMAGE_QUALITY = {"avif": 55, "webp": 75, "jpeg": 80}
+
+# Images and fonts are already compressed; everything else benefits from br/gzip
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".json", ".svg", ".xml", ".txt", ".html", ".pdf", ".map")
+# Keep a compressed sibling only if it is at least this much smaller than the original
+MIN_COMPRESSION_SAVING = 0.05
+
+_STATIC_IMAGE_RE = re.compile(r"""/static/([\w./-]+\.(?:png|jpe?g))""")
+
+
+def find_images() -> list:
+    """Collect every image referenced by the project data or the templates"""
+    from portfolio_data import get_projects
+
+    found = {project.image for project in get_projects() if project.image}
+    for name in os.listdir(TEMPLATES_DIR):
+        with open(os.path.join(TEMPLATES_DIR, name), encoding="utf-8") as f:
+            found.update(f"/static/{path}" for path in _STATIC_IMAGE_RE.findall(f.read()))
+    return sorted(found)
+
+
+def build_images() -> None:
+    """Write resized variants of every referenced image and the image manifest"""
+    from PIL import Image
+
+    out_dir = os.path.join(DIST_DIR, "img")
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {}
+    written = set()
+    for src in find_images():
+        rel = src[len("/static/"):]
+        path = os.path.join(STATIC_DIR, rel)
+        # profile.jpeg and profile.png must not share variants: name them from the whole path
+        base, source_ext = os.path.splitext(rel)
+        base = f"{base}-{source_ext[1:]}".replace("/", "-")
+        with Image.open(path) as original:
+            image = original.convert("RGBA") if original.mode in ("RGBA", "LA", "P") else original.convert("RGB")
+        # Only keep PNG as the fallback when the image really uses transparency
+        has_alpha = image.mode == "RGBA" and image.getchannel("A").getextrema()[0] < 255
+        if image.mode == "RGBA" and not has_alpha:
+            image = image.convert("RGB")
+        fallback = ("png", "image/png") if has_alpha else ("jpeg", "image/jpeg")
+
+        widths = [w for w in IMAGE_WIDTHS if w < image.width] + [image.width]
+        sources = {}
+        for ext, mime in (("avif", "image/avif"), ("webp", "image/webp"), fallback):
+            variants = []
+            for width in widths:
+                height = round(image.height * width / image.width)
+                resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                name = f"{base}-{width}.{'jpg' if ext == 'jpeg' else ext}"
+                if name in written:
+                    raise SystemExit(f"images: {name} would be written twice")
+                written.add(name)
+                options = {"optimize": True} if ext == "png" else {"quality": IMAGE_QUALITY[ext]}
+                resized.save(os.path.join(out_dir, name), ext.upper(), **options)
+                variants.append([width, f"/static/dist/img/{name}"])
+            sources[mime] = variants
+        manifest[src] = {"width": image.width, "height": image.height, "sources": sources}
+        print(f"images: {src} -> {len(widths)} widths x {len(sources)} formats")
+
+    with open(IMAGE_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def _tailwind(output: str, content: str = None) -> None:
+    command = shlex.split(TAILWIND_CMD) + [
+        "--config", "tailwind.config.js", "--input", TAILWIND_INPUT, "--output", output, "--minify",
+    ]
+    if content:
+        command += ["--content", content]
+    subprocess.run(command, check=True)
+
+
+def build_css() -> None:
+    """Compile the purged Tailwind stylesheet, plus a critical subset per page for INLINE_CRITICAL_CSS"""
+    os.makedirs(CRITICAL_CSS_DIR, exist_ok=True)
+    full = os.path.join(DIST_DIR, "tailwind.css")
+    _tailwind(full)
+    print(f"css: {full} {os.path.getsize(full)} bytes")
+    with tempfile.TemporaryDirectory() as tmp:
+        for template, extra_content in CRITICAL_CSS_PAGES.items():
+            with open(os.path.join(TEMPLATES_DIR, template), encoding="utf-8") as f:
+                first_screen = f.read().split(FOLD_MARKER, 1)[0]
+            # Keep the extension, so Tailwind extracts classes from it as HTML
+            extract = os.path.join(tmp, template)
+            with open(extract, "w", encoding="utf-8") as f:
+                f.write(first_screen)
+            critical = os.path.join(STATIC_DIR, critical_css_file(template))
+            shell = (os.path.join(TEMPLATES_DIR, "base.html"), "assets.py", extract)
+            _tailwind(critical, content=",".join(shell + extra_content))
+            print(f"css: {critical} {os.path.getsize(critical)} bytes")
+
+
+def _static_files() -> list:
+    """List files under static/ relative to it, skipping build manifests and earlier hashed copies"""
+    skip = {os.path.relpath(path, STATIC_DIR) for path in (ASSET_MANIFEST, IMAGE_MANIFEST)}
+    hashed_root = os.path.relpath(HASHED_DIR, STATIC_DIR)
+    files = []
+    for root, dirs, names in os.walk(STATIC_DIR):
+        rel_root = os.path.relpath(root, STATIC_DIR)
+        if rel_root == hashed_root:
+            dirs[:] = []
+            continue
+        for name in names:
+            rel = os.path.normpath(os.path.join(rel_root, name))
+            if rel not in skip and not name.endswith((".br", ".gz")):
+                files.append(rel.replace(os.sep, "/"))
+    return sorted(files)
+
+
+def build_fingerprint() -> None:
+    """Copy every static file to a content-hashed name and write the asset manifest"""
+    if os.path.isdir(HASHED_DIR):
+        shutil.rmtree(HASHED_DIR)
+    hashed_prefix = os.path.relpath(HASHED_DIR, STATIC_DIR).replace(os.sep, "/")
+    dist_prefix = os.path.relpath(DIST_DIR, STATIC_DIR).replace(os.sep, "/") + "/"
+    manifest = {}
+    for rel in _static_files():
+        with open(os.path.join(STATIC_DIR, rel), "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:10]
+        # dist/img/a.webp -> dist/assets/img/a.<hash>.webp rather than dist/assets/dist/img/...
+        stem, ext = os.path.splitext(rel[len(dist_prefix):] if rel.startswith(dist_prefix) else rel)
+        hashed = f"{hashed_prefix}/{stem}.{digest}{ext}"
+        os.makedirs(os.path.dirname(os.path.join(STATIC_DIR, hashed)), exist_ok=True)
+        shutil.copy2(os.path.join(STATIC_DIR, rel), os.path.join(STATIC_DIR, hashed))
+        manifest[rel] = hashed
+    os.makedirs(DIST_DIR, exist_ok=True)
+    with open(ASSET_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"fingerprint: {len(manifest)} files")
+
+
+def build_compress() -> None:
+    """Write .br and .gz siblings for every compressible file under static/"""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("compress: brotli is not installed, writing gzip only")
+
+    written = 0
+    for root, _, names in os.walk(STATIC_DIR):
+        for name in names:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            encoders = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                encoders.append((".br", lambda d: brotli.compress(d, quality=11)))
+            for suffix, encode in encoders:
+                encoded = encode(data)
+                if len(encoded) > len(data) * (1 - MIN_COMPRESSION_SAVING):
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+                    continue
+                with open(path + suffix, "wb") as f:
+                    f.write(encoded)
+                written += 1
+    print(f"compress: {written} precompressed files")
+
+
+def build_templates() -> None:
+    """Compile every template into the Jinja bytecode cache shipped with the deployment"""
+    from templating import JINJA_CACHE_DIR, create_templates, preload_templates
+
+    if os.path.isdir(JINJA_CACHE_DIR):
+        shutil.rmtree(JINJA_CACHE_DIR)
+    os.makedirs(JINJA_CACHE_DIR)
+    count = preload_templates(create_templates().env)
+    print(f"templates: {count} templates compiled into {JINJA_CACHE_DIR}/")
+
+
+def build_content() -> None:
+    """Parse every content file into the JSON cache shipped with the deployment"""
+    from portfolio_data import CONTENT_CACHE, _store
+
+    count = _store.write_cache(CONTENT_CACHE)
+    print(f"content: {count} files parsed into {CONTENT_CACHE}")
+
+
+def _export_file(path: str) -> str:
+    """Map a route path to its file under the export directory ('/about' -> 'about/index.html')"""
+    if path == "/":
+        return "index.html"
+    path = path.strip("/")
+    return path if os.path.splitext(path)[1] else f"{path}/index.html"
+
+
+def exportable_routes() -> list:
+    """Every URL of the GET routes in main.py that do not need per-request rendering,
+    with path parameters expanded (e.g. one /projects/<slug> per project)
+    """
+    from fastapi.routing import APIRoute
+    from main import app, route_paths
+
+    return sorted(
+        path for route in app.routes
+        if isinstance(route, APIRoute) and "GET" in route.methods and route.path not in DYNAMIC_ROUTES
+        for path in route_paths(route.path)
+    )
+
+
+def _vercel_routes(paths: list, links: dict) -> list:
+    """Vercel routes serving the export, followed by those of vercel.json, which send everything else to main.py.
+    `links` maps exported pages to the preload Link header values for their critical assets.
+    """
+    from main import PAGE_CACHE_CONTROL
+    from static_files import IMMUTABLE_CACHE_CONTROL
+
+    routes = [{"src": path, "dest": "/main.py"} for path in sorted(DYNAMIC_ROUTES)]
+    for path, params in QUERY_ROUTES.items():
+        routes.extend(
+            {"src": f"{path}/?", "has": [{"type": "query", "key": param}], "dest": "/main.py"} for param in params
+        )
+    routes.append({
+        "src": "/static/dist/assets/(.*)",
+        "headers": {"Cache-Control": IMMUTABLE_CACHE_CONTROL},
+        "dest": "/static/dist/assets/$1",
+    })
+    routes.append({"src": "/static/(.*)", "dest": "/static/$1"})
+    for path in paths:
+        src = path if path == "/" or os.path.splitext(path)[1] else f"{path}/?"
+        route = {"src": src, "dest": f"/{_export_file(path)}"}
+        if _export_file(path).endswith(".html"):
+            route["headers"] = {"Cache-Control": PAGE_CACHE_CONTROL}
+            if links.get(path):
+                route["headers"]["Link"] = ", ".join(links[path])
+        routes.append(route)
+    with open(VERCEL_CONFIG, encoding="utf-8") as f:
+        routes.extend(json.load(f)["routes"])
+    return routes
+
+
+def build_export() -> None:
+    """Render every exportable route into the Build Output of `vercel build` and route them there.
+    Deploy the result with `vercel deploy --prebuilt`; a deployment built from git alone serves
+    every page from main.py, as vercel.json routes it.
+    """
+    from fastapi.testclient import TestClient
+    from early_hints import preload_links
+    from main import app
+
+    if not os.path.isdir(VERCEL_FUNCTION):
+        raise SystemExit(f"export: {VERCEL_FUNCTION} not found, run `vercel build` first")
+    if os.path.isdir(EXPORT_DIR):
+        shutil.rmtree(EXPORT_DIR)
+    shutil.copytree(STATIC_DIR, os.path.join(EXPORT_DIR, STATIC_DIR))
+
+    # Not entered as a context manager, so the app's lifespan (mail worker) never starts
+    client = TestClient(app)
+    paths = exportable_routes()
+    links = {}
+    for path in paths:
+        response = client.get(path)
+        response.raise_for_status()
+        target = os.path.join(EXPORT_DIR, _export_file(path))
+        os.makedirs(os.path.dirname(target) or EXPORT_DIR, exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(response.content)
+        print(f"export: {path} -> {target} ({len(response.content)} bytes)")
+        if target.endswith(".html"):
+            links[path] = preload_links(response.content)
+
+    output_config = os.path.join(VERCEL_OUTPUT, "config.json")
+    with open(output_config, encoding="utf-8") as f:
+        config = json.load(f)
+    # Rebuilt from vercel.json each time, so exporting twice does not stack routes
+    config["routes"] = _vercel_routes(paths, links)
+    with open(output_config, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=4)
+        f.write("\n")
+    print(f"export: {len(config['routes'])} routes written to {output_config}")
+
+
+def minify_report() -> None:
+    """Render every page route with and without template minification and print the bytes saved"""
+    from fastapi.testclient import TestClient
+
+    import main
+    import page_cache
+    from html_minify import MINIFY_HTML
+
+    env = main.templates.env
+    env.bytecode_cache = None
+    client = TestClient(main.app)
+    paths = [path for route_path in main.page_routes() for path in main.route_paths(route_path)]
+    bodies = {}
+    for minify in (False, True):
+        env.minify_html = minify
+        env.cache.clear()
+        env.fragment_cache.clear()
+        page_cache.clear()
+        for path in paths:
+            response = client.get(path)
+            response.raise_for_status()
+            # The contact form embeds a fresh token each time; its length is the same on both passes
+            bodies.setdefault(path, []).append(response.content)
+
+    width = max(map(len, bodies)) + 2
+    print(f"{'route':<{width}}{'bytes':>9}{'minified':>10}{'saved':>8}{'gzip':>8}{'minified':>10}{'saved':>8}")
+    totals = [0, 0, 0, 0]
+    for path, (original, minified) in bodies.items():
+        sizes = [len(original), len(minified), len(gzip.compress(original)), len(gzip.compress(minified))]
+        totals = [total + size for total, size in zip(totals, sizes)]
+        print(f"{path:<{width}}{sizes[0]:9}{sizes[1]:10}{1 - sizes[1] / sizes[0]:8.1%}"
+              f"{sizes[2]:8}{sizes[3]:10}{1 - sizes[3] / sizes[2]:8.1%}")
+    print(f"{'total':<{width}}{totals[0]:9}{totals[1]:10}{1 - totals[1] / totals[0]:8.1%}"
+          f"{totals[2]:8}{totals[3]:10}{1 - totals[3] / totals[2]:8.1%}")
+    # Markdown content is minified (or not) when it loads, so it is the same on both passes
+    print(f"minify-report: templates only; Markdown content is {'' if MINIFY_HTML else 'not '}minified on both passes")
+
+
+STEPS = {
+    "images": build_images,
+    "css": build_css,
+    "fingerprint": build_fingerprint,
+    "compress": build_compress,
+    "templates": build_templates,
+    "content": build_content,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("steps", nargs="+", choices=[*STEPS, "all", "export", "minify-report"],
+                        help="build steps to run, in order")
+    args = parser.parse_args()
+    steps = list(STEPS) if "all" in args.steps else args.steps
+    for step in steps:
+        if step == "export":
+            build_export()
+        elif step == "minify-report":
+            minify_report()
+        else:
+            STEPS[step]()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Durable spool for contact form submissions.
+
+Every validated submission is appended to a SQLite database in WAL mode before
+the request returns, so nothing is lost when the SMTP relay is slow or down.
+Delivery workers claim pending rows in batches, and each row tracks its own
+delivery state, attempt count and next retry time. A row is deleted as soon as
+its email is sent, so the spool never keeps personal data it no longer needs;
+only rows that were given up on stay for inspection.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+PENDING = "pending"
+SENDING = "sending"
+FAILED = "failed"  # Gave up after too many attempts
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    message TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    claimed_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS submissions_due ON submissions (state, next_attempt_at);
+"""
+
+
+class Submission(NamedTuple):
+    id: int
+    name: str
+    email: str
+    subject: str
+    message: str
+    created_at: float
+    attempts: int
+
+
+class ContactSpool:
+    """Append-only SQLite spool shared by every worker process on the host"""
+
+    def __init__(self, path: str, lease_timeout: float = 300.0):
+        self.path = path
+        # A claimed row whose worker died is handed out again after this long
+        self.lease_timeout = lease_timeout
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            # Spools written before sent rows were deleted on delivery
+            conn.execute("DELETE FROM submissions WHERE state = 'sent'")
+            self._conn = conn
+        return self._conn
+
+    def append(self, name: str, email: str, subject: str, message: str) -> int:
+        """Durably record a submission and return its id"""
+        now = time.time()
+        with self._lock:
+            cursor = self._connection().execute(
+                "INSERT INTO submissions (name, email, subject, message, created_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (name, email, subject, message, now, now),
+            )
+            return cursor.lastrowid
+
+    def claim_batch(self, limit: int) -> List[Submission]:
+        """Claim up to `limit` submissions that are due for delivery"""
+        return self._claim("ORDER BY id LIMIT ?", (limit,))
+
+    def claim(self, submission_id: int) -> Optional[Submission]:
+        """Claim one submission if it is due for delivery and no other worker holds it"""
+        claimed = self._claim("AND id = ?", (submission_id,))
+        return claimed[0] if claimed else None
+
+    def _claim(self, clause: str, params: tuple) -> List[Submission]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id, name, email, subject, message, created_at, attempts FROM submissions "
+                    "WHERE ((state = ? AND next_attempt_at <= ?) OR (state = ? AND claimed_at <= ?)) " + clause,
+                    (PENDING, now, SENDING, now - self.lease_timeout) + params,
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE submissions SET state = ?, claimed_at = ? WHERE id = ?",
+                    [(SENDING, now, row[0]) for row in rows],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return [Submission(*row) for row in rows]
+
+    def mark_sent(self, submission_id: int) -> None:
+        """Delete a delivered submission"""
+        with self._lock:
+            self._connection().execute("DELETE FROM submissions WHERE id = ?", (submission_id,))
+
+    def mark_failed(self, submission_id: int, error: str, retry_at: Optional[float]) -> None:
+        """Record a failed attempt; the row is retried at `retry_at`, or given up on if it is None"""
+        state = FAILED if retry_at is None else PENDING
+        with self._lock:
+            self._connection().execute(
+                "UPDATE submissions SET state = ?, attempts = attempts + 1, next_attempt_at = ?, "
+                "claimed_at = NULL, last_error = ? WHERE id = ?",
+                (state, retry_at or time.time(), error, submission_id),
+            )
+
+    def last_error(self, submission_id: int) -> Optional[str]:
+        """Return the last delivery error of a submission, or None if it was sent (or never failed)"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT last_error FROM submissions WHERE id = ?", (submission_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def next_due(self) -> Optional[float]:
+        """Return when the earliest pending submission becomes due, if any"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT MIN(next_attempt_at) FROM submissions WHERE state = ?", (PENDING,)
+            ).fetchone()
+        return row[0]
+
+    def counts(self) -> dict:
+        """Return the number of submissions in each delivery state"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT state, COUNT(*) FROM submissions GROUP BY state"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
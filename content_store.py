@@ -0,0 +1,220 @@
+"""Site content loaded from files under a content directory, reloaded when they change.
+
+Supported formats, chosen by extension:
+
+* .yaml / .yml / .json → parsed data
+* .md → optional YAML front matter between `---` lines, plus a Markdown body
+  pre-rendered to minified HTML at load time (raw HTML blocks pass through)
+
+Each file is parsed once and kept with its (mtime, inode, size) signature.
+`ContentStore.refresh()` stats every file and reparses only those whose
+signature changed. It is cheap enough to run every few seconds. A reload
+builds a complete new snapshot and swaps it in with one assignment, so
+readers never see half-loaded content. If a file fails to parse (e.g. while
+it is being edited) or the content fails to build, the previous snapshot stays
+in place until the files change again.
+
+`python build.py content` writes every parsed file to a JSON cache keyed by
+the file's content digest. A cold start then reads that cache instead of
+importing the YAML and Markdown libraries and parsing every file.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from html_minify import MINIFY_HTML, minify_html
+
+EXTENSIONS = (".yaml", ".yml", ".json", ".md")
+# Prebuilt caches written with other parse settings are ignored
+CACHE_FORMAT = "1-minified" if MINIFY_HTML else "1"
+
+
+class ContentFile(NamedTuple):
+    signature: Tuple[int, int, int]  # (st_mtime_ns, st_ino, st_size)
+    digest: str
+    data: Any
+
+
+class MarkdownDocument(NamedTuple):
+    meta: dict
+    html: str
+
+
+def _parse_yaml(text: str) -> Any:
+    import yaml
+
+    # The libyaml-backed loader is several times faster when PyYAML was built with it
+    return yaml.load(text, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+_markdown = None
+
+
+def render_markdown(text: str) -> str:
+    global _markdown
+    if _markdown is None:
+        from markdown import Markdown
+        from markdown.extensions.attr_list import AttrListExtension
+        from markdown.extensions.fenced_code import FencedCodeExtension
+        from markdown.extensions.sane_lists import SaneListExtension
+        from markdown.extensions.tables import TableExtension
+
+        # Extension instances rather than names: names are resolved through a slow entry point scan
+        _markdown = Markdown(extensions=[
+            AttrListExtension(), FencedCodeExtension(), SaneListExtension(), TableExtension()
+        ])
+    return _markdown.reset().convert(text)
+
+
+def parse_markdown(text: str) -> MarkdownDocument:
+    """Split optional YAML front matter from a Markdown document and render its body"""
+    meta = {}
+    if text.startswith("---\n"):
+        end = text.find("\n---\n", 3)
+        if end != -1:
+            meta = _parse_yaml(text[4:end]) or {}
+            text = text[end + len("\n---\n"):]
+    html = render_markdown(text)
+    return MarkdownDocument(meta, minify_html(html) if MINIFY_HTML else html)
+
+
+def parse_file(path: str, text: str) -> Any:
+    extension = os.path.splitext(path)[1]
+    if extension == ".json":
+        return json.loads(text)
+    if extension == ".md":
+        return parse_markdown(text)
+    return _parse_yaml(text)
+
+
+def _to_json(data: Any) -> Any:
+    if isinstance(data, MarkdownDocument):
+        return {"markdown": {"meta": data.meta, "html": data.html}}
+    return {"data": data}
+
+
+def _from_json(entry: dict) -> Any:
+    if "markdown" in entry:
+        return MarkdownDocument(entry["markdown"]["meta"], entry["markdown"]["html"])
+    return entry["data"]
+
+
+class ContentStore:
+    """Parsed content files under `directory`, turned into a snapshot by `build(files)`.
+    `files` maps paths relative to the directory (with forward slashes) to parsed data.
+    """
+
+    def __init__(self, directory: str, build: Callable[[Dict[str, Any]], Any], check_interval: float = 1.0,
+                 cache_path: Optional[str] = None):
+        self.directory = directory
+        self.build = build
+        self.check_interval = check_interval  # 0 disables reloading after the first load
+        self.cache_path = cache_path
+        self._prebuilt: Optional[Dict[str, dict]] = None  # content digest -> parsed data, from cache_path
+        self._files: Dict[str, ContentFile] = {}
+        self._failed: Dict[str, Tuple[int, int, int]] = {}  # signatures that failed to parse
+        self._snapshot: Optional[Tuple[str, float, Any]] = None  # (version, latest mtime, built content)
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        found = {}
+        for root, dirs, names in os.walk(self.directory):
+            dirs.sort()
+            for name in sorted(names):
+                if name.endswith(EXTENSIONS) and not name.startswith("."):
+                    path = os.path.join(root, name)
+                    found[os.path.relpath(path, self.directory).replace(os.sep, "/")] = os.stat(path)
+        return found
+
+    def refresh(self) -> bool:
+        """Reparse changed files and rebuild the snapshot if anything changed. Returns True on a reload."""
+        with self._lock:
+            self._last_check = time.monotonic()
+            stats = self._scan()
+            files = {name: entry for name, entry in self._files.items() if name in stats}
+            changed = len(files) != len(self._files)
+            for name, stat in stats.items():
+                signature = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+                entry = files.get(name)
+                if (entry is not None and entry.signature == signature) or self._failed.get(name) == signature:
+                    continue
+                try:
+                    with open(os.path.join(self.directory, name), "rb") as f:
+                        raw = f.read()
+                    digest = hashlib.sha256(raw).hexdigest()
+                    prebuilt = self._load_prebuilt().get(digest)
+                    data = _from_json(prebuilt) if prebuilt else parse_file(name, raw.decode("utf-8"))
+                    files[name] = ContentFile(signature, digest, data)
+                    changed = True
+                    self._failed.pop(name, None)
+                except Exception as e:
+                    if self._snapshot is None:
+                        raise
+                    self._failed[name] = signature
+                    print(f"WARNING: Could not load content file {name}, keeping the previous version: {e}")
+            if not changed and self._snapshot is not None:
+                return False
+
+            try:
+                built = self.build({name: entry.data for name, entry in files.items()})
+            except Exception as e:
+                if self._snapshot is None:
+                    raise
+                print(f"WARNING: Could not build the content, keeping the previous version: {e!r}")
+                # Remember the files anyway, so they are only retried once they change again
+                self._files = files
+                return False
+            version = hashlib.sha256(
+                "".join(f"{name}:{entry.digest}" for name, entry in sorted(files.items())).encode()
+            ).hexdigest()[:12]
+            latest_mtime = max((entry.signature[0] for entry in files.values()), default=0) / 1e9
+            self._files = files
+            self._snapshot = (version, latest_mtime, built)
+            return True
+
+    def _load_prebuilt(self) -> Dict[str, dict]:
+        if self._prebuilt is None:
+            self._prebuilt = {}
+            if self.cache_path:
+                try:
+                    with open(self.cache_path, encoding="utf-8") as f:
+                        cache = json.load(f)
+                    if cache.get("format") == CACHE_FORMAT:
+                        self._prebuilt = cache["files"]
+                except (OSError, ValueError, AttributeError, KeyError):
+                    pass
+        return self._prebuilt
+
+    def write_cache(self, path: str) -> int:
+        """Write every parsed file to a JSON cache for later cold starts. Returns the number of files."""
+        self.refresh()
+        cache = {entry.digest: _to_json(entry.data) for entry in self._files.values()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"format": CACHE_FORMAT, "files": cache}, f, default=str)  # dates become ISO strings
+        return len(cache)
+
+    def _current(self) -> Tuple[str, float, Any]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.refresh()
+        elif self.check_interval and time.monotonic() - self._last_check >= self.check_interval:
+            # One caller checks the files; everyone else keeps using the current snapshot meanwhile
+            if not self._lock.locked():
+                self.refresh()
+        return self._snapshot
+
+    def get(self) -> Any:
+        """The content built from the current files, reloading them first if a check is due"""
+        return self._current()[2]
+
+    def version(self) -> str:
+        """Digest of every content file, which changes whenever any of them does"""
+        return self._current()[0]
+
+    def latest_mtime(self) -> float:
+        """Modification time of the most recently changed content file, as a Unix timestamp"""
+        return self._current()[1]
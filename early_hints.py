@@ -0,0 +1,108 @@
+"""Preload hints for the assets each page needs before the browser could discover them.
+
+The hints are derived from a page's rendered HTML: the stylesheets and
+blocking scripts in its <head>, stylesheets pulled in with @import, and the
+images marked fetchpriority="high" (the `eager` images of `picture()`).
+They are recorded whenever a cached page is rendered. On a server, main.py
+also renders the top-level cached pages at startup, so a new worker's first
+response to them already has the hints.
+EarlyHintsMiddleware (in middleware.py) announces them on requests for that
+route without a query string, both as a `Link: rel=preload` header and, on
+servers that support the ASGI early hints extension, as a 103 Early Hints
+response sent before the page is rendered. `python build.py export` puts the same Link headers on the
+exported pages.
+"""
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+_IMPORT_URL = re.compile(r"""@import\s+url\(\s*['"]?([^'")\s]+)['"]?\s*\)""")
+
+# route -> preload links, e.g. '</static/styles.css>; rel=preload; as=style'
+_links: Dict[str, List[str]] = {}
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class _CriticalAssetParser(HTMLParser):
+    """Collect preload links for the critical assets of an HTML document"""
+
+    def __init__(self):
+        super().__init__()
+        self.links: List[str] = []
+        self._seen = set()
+        self._in_head = False
+        self._in_style = False
+        self._picture_source: Optional[dict] = None
+        self._in_picture = False
+
+    def _add(self, url: str, params: str) -> None:
+        if url and url not in self._seen:
+            self._seen.add(url)
+            self.links.append(f"<{url}>; rel=preload; {params}")
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "head":
+            self._in_head = True
+        elif tag == "style":
+            self._in_style = True
+        elif tag == "link" and self._in_head and (attrs.get("rel") or "").lower() == "stylesheet":
+            self._add(attrs.get("href"), "as=style" + ("; crossorigin" if "crossorigin" in attrs else ""))
+        elif tag == "script" and self._in_head and attrs.get("src") and "async" not in attrs and "defer" not in attrs:
+            self._add(attrs["src"], "as=script" + ("; crossorigin" if "crossorigin" in attrs else ""))
+        elif tag == "picture":
+            self._in_picture = True
+            self._picture_source = None
+        elif tag == "source" and self._in_picture and self._picture_source is None and attrs.get("srcset"):
+            self._picture_source = attrs
+        elif tag == "img" and (attrs.get("fetchpriority") or "").lower() == "high":
+            self._add_image(self._picture_source if self._in_picture and self._picture_source else attrs)
+
+    def _add_image(self, attrs: dict) -> None:
+        srcset = attrs.get("srcset")
+        url = attrs.get("src") or (srcset.split(",")[0].split()[0] if srcset else None)
+        params = ["as=image"]
+        if attrs.get("type"):
+            params.append(f"type={_quote(attrs['type'])}")
+        if srcset:
+            params.append(f"imagesrcset={_quote(srcset)}")
+            if attrs.get("sizes"):
+                params.append(f"imagesizes={_quote(attrs['sizes'])}")
+        params.append("fetchpriority=high")
+        self._add(url, "; ".join(params))
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self._in_head = False
+        elif tag == "style":
+            self._in_style = False
+        elif tag == "picture":
+            self._in_picture = False
+            self._picture_source = None
+
+    def handle_data(self, data):
+        if self._in_style:
+            for url in _IMPORT_URL.findall(data):
+                self._add(url, "as=style")
+
+
+def preload_links(html: bytes) -> List[str]:
+    """Return the Link header values preloading the critical assets of a rendered page"""
+    parser = _CriticalAssetParser()
+    parser.feed(html.decode("utf-8", "replace"))
+    parser.close()
+    return parser.links
+
+
+def record(route: str, html: bytes) -> None:
+    """Derive and remember the preload links of a route from its freshly rendered HTML"""
+    _links[route] = preload_links(html)
+
+
+def links_for(path: str) -> Optional[List[str]]:
+    """Preload links recorded for a path, or None if its page has not been rendered yet"""
+    return _links.get(path)
+
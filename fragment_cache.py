@@ -0,0 +1,106 @@
+"""Jinja extension caching rendered template fragments.
+
+    {% cache "nav", active_page %} ... {% endcache %}
+
+renders its body once per distinct key and reuses the HTML afterwards. The
+key is the name plus any further arguments, so a fragment that depends on a
+context variable lists that variable. It also includes the template name and
+a digest of the fragment's compiled body, so editing a fragment never serves
+its old output. Entries are kept in a bounded LRU (FRAGMENT_CACHE_SIZE).
+
+Everything a fragment reads from the portfolio data is covered by the
+environment's `fragment_cache_version()`, which main.py ties to the data version
+and the asset build. When it changes, the whole cache is dropped.
+This means pages that cannot be cached whole (the contact form with its
+per-request token, filtered project listings, pages after a data reload) only
+render their per-request parts.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+import metrics
+
+FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "256"))
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered fragments, emptied whenever the version changes"""
+
+    def __init__(self, max_size: int = FRAGMENT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def get(self, version: str, key: tuple) -> Optional[str]:
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+                return None
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+            return html
+
+    def set(self, version: str, key: tuple, html: str) -> None:
+        with self._lock:
+            if version != self._version:
+                # Rendered under a version that has since been replaced
+                return
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FragmentCacheExtension(Extension):
+    """Adds the `{% cache name, *vary %}...{% endcache %}` tag"""
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(
+            fragment_cache=FragmentCache(),
+            fragment_cache_version=lambda: "",
+        )
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        # Same body, same digest: the bytecode cache and every process agree on it
+        digest = hashlib.sha256(f"{parser.name}:{body!r}".encode()).hexdigest()[:16]
+        return nodes.CallBlock(
+            self.call_method("_render", [nodes.Const(digest), nodes.List(args)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, digest: str, vary: list, caller: Callable[[], str]) -> str:
+        cache: FragmentCache = self.environment.fragment_cache
+        version = self.environment.fragment_cache_version()
+        key = (digest, *vary)
+        html = cache.get(version, key)
+        if html is not None:
+            metrics.inc("fragment_cache_requests_total", result="hit")
+            return html
+        metrics.inc("fragment_cache_requests_total", result="miss")
+        html = caller()
+        cache.set(version, key, html)
+        return html
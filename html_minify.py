@@ -0,0 +1,83 @@
+"""Whitespace and comment minification of HTML and of Jinja template sources.
+
+`minify_html` collapses every run of whitespace in markup to a single space
+(or a newline when the run contained one), drops whitespace next to
+block-level tags, where browsers ignore it, and removes HTML comments. The
+contents of <pre>, <textarea>, <script> and <style> are left untouched, as are
+Jinja tags, expressions and comments, so it applies to template sources too.
+Conditional comments and comments containing Jinja syntax are kept.
+
+HtmlMinifyExtension runs it on every template source before Jinja compiles
+it, so minification costs nothing per request and `python build.py
+templates` ships minified bytecode. content_store minifies pre-rendered
+Markdown, such as the experience descriptions, when it loads the files. Set
+MINIFY_HTML=false to turn both off.
+"""
+import os
+import re
+
+from jinja2.ext import Extension
+
+MINIFY_HTML = os.getenv("MINIFY_HTML", "true").lower() == "true"
+
+# Jinja syntax, raw-text elements and comments, kept out of whitespace collapsing
+_PROTECTED = re.compile(
+    r"\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}"
+    r"|<(pre|textarea|script|style)\b.*?</\1\s*>"
+    r"|<!--.*?-->",
+    re.DOTALL | re.IGNORECASE,
+)
+_WHITESPACE = re.compile(r"\s+")
+_BLOCK_TAGS = (
+    "!doctype|html|head|body|title|meta|link|base|header|footer|nav|main|section|article|aside|div|p|"
+    "h[1-6]|ul|ol|li|dl|dt|dd|table|thead|tbody|tfoot|tr|td|th|form|fieldset|figure|figcaption|br|hr|"
+    "noscript|blockquote|address"
+)
+# Whitespace around a complete block-level tag
+_AROUND_BLOCK_TAG = re.compile(rf"\s*(</?(?:{_BLOCK_TAGS})\b[^<>]*>)\s*", re.IGNORECASE)
+# Whitespace before a block-level tag whose attributes continue in Jinja syntax, e.g. <div class="{{ css }}">
+_BEFORE_BLOCK_TAG = re.compile(rf"\s+(?=</?(?:{_BLOCK_TAGS})\b[^<>]*$)", re.IGNORECASE)
+
+
+def _collapse(match: re.Match) -> str:
+    return "\n" if "\n" in match.group() else " "
+
+
+def _minify_markup(text: str) -> str:
+    text = _WHITESPACE.sub(_collapse, text)
+    text = _AROUND_BLOCK_TAG.sub(r"\1", text)
+    return _BEFORE_BLOCK_TAG.sub("", text)
+
+
+def _keep(segment: str) -> str:
+    if segment.startswith("<!--"):
+        # Conditional comments and commented-out template code stay; other comments go
+        if segment.startswith("<!--[if") or "{" in segment:
+            return segment
+        return ""
+    return segment
+
+
+def minify_html(html: str) -> str:
+    """Minify HTML (or an HTML Jinja template source)"""
+    parts = []
+    position = 0
+    for match in _PROTECTED.finditer(html):
+        parts.append(_minify_markup(html[position:match.start()]))
+        parts.append(_keep(match.group()))
+        position = match.end()
+    parts.append(_minify_markup(html[position:]))
+    return "".join(parts).strip()
+
+
+class HtmlMinifyExtension(Extension):
+    """Minify the source of every .html template before it is compiled"""
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(minify_html=MINIFY_HTML)
+
+    def preprocess(self, source, name, filename=None):
+        if self.environment.minify_html and name and name.endswith(".html"):
+            return minify_html(source)
+        return source
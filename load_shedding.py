@@ -0,0 +1,208 @@
+"""Adaptive concurrency limits and load shedding per route class.
+
+Requests are split into classes with separate budgets, so a flood of one kind
+cannot starve the others: "static" (files under /static), "contact"
+(POST /contact, which checks tokens and spools email) and "page" (everything
+else). /metrics is never limited. Each class admits up to its current limit of
+requests at once. Further requests wait in a FIFO queue of bounded length for
+at most the class's queue timeout. When the queue is full, or the wait runs
+out, the request gets an immediate 503 with Retry-After instead of adding to
+the backlog.
+
+Limits adapt to observed latency, in the manner of the "gradient" limiters
+from Netflix's concurrency-limits library. Each class keeps a slow-moving
+average of its latency (what it normally costs) and a fast-moving one (what
+it costs right now). While the two agree, the limit grows by about the
+square root of itself. Once the recent latency exceeds the normal latency by
+more than LATENCY_TOLERANCE, the limit shrinks in proportion, down to the
+class minimum. A saturated contact path thus throttles itself while cached
+pages keep their own budget and stay fast.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, NamedTuple, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+import metrics
+
+LOAD_SHEDDING = os.getenv("LOAD_SHEDDING", "true").lower() == "true"
+# Recent latency may exceed the usual latency by this factor before limits shrink
+LATENCY_TOLERANCE = float(os.getenv("LOAD_SHED_LATENCY_TOLERANCE", "1.5"))
+
+
+class RouteClass(NamedTuple):
+    initial_limit: int
+    min_limit: int
+    max_limit: int
+    max_queue: int
+    queue_timeout: float  # seconds
+    retry_after: int  # seconds, sent with 503s
+
+
+def _route_class(name: str, default: RouteClass) -> RouteClass:
+    """Default budget of a class, with its limits overridable as LOAD_SHED_<NAME>=initial,min,max,queue"""
+    value = os.getenv(f"LOAD_SHED_{name.upper()}")
+    if not value:
+        return default
+    initial, minimum, maximum, queue = (int(part) for part in value.split(","))
+    return default._replace(initial_limit=initial, min_limit=minimum, max_limit=maximum, max_queue=queue)
+
+
+ROUTE_CLASSES = {
+    "static": _route_class("static", RouteClass(64, 8, 512, 512, 1.0, 1)),
+    "page": _route_class("page", RouteClass(32, 4, 256, 128, 2.0, 2)),
+    "contact": _route_class("contact", RouteClass(4, 1, 16, 16, 5.0, 30)),
+}
+
+
+def route_class(scope: Scope) -> Optional[str]:
+    """The budget a request counts against, or None if it is never limited"""
+    path = scope["path"]
+    if path.startswith("/static/"):
+        return "static"
+    if path == "/contact" and scope["method"] == "POST":
+        return "contact"
+    if path == "/metrics":
+        return None
+    return "page"
+
+
+class GradientLimit:
+    """Concurrency limit adjusted from the ratio of usual to recent latency"""
+
+    SMOOTHING = 0.2
+    SHORT_WINDOW = 10  # samples averaged into the recent latency
+    LONG_WINDOW = 600  # samples averaged into the usual latency
+
+    def __init__(self, initial: int, minimum: int, maximum: int, tolerance: float = LATENCY_TOLERANCE):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.short_latency: Optional[float] = None
+        self.long_latency: Optional[float] = None
+
+    def update(self, latency: float, in_flight: int) -> None:
+        """Record the latency of a finished request, with `in_flight` requests running when it finished"""
+        if self.short_latency is None:
+            self.short_latency = self.long_latency = latency
+        self.short_latency += (latency - self.short_latency) / self.SHORT_WINDOW
+        self.long_latency += (latency - self.long_latency) / self.LONG_WINDOW
+        # After a slow period the usual latency recovers faster than its window would allow
+        if self.long_latency > 2 * self.short_latency:
+            self.long_latency *= 0.95
+        # A limit that is not being used says nothing about the capacity behind it
+        if in_flight < self.limit / 2:
+            return
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_latency / self.short_latency))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        limit = self.limit * (1 - self.SMOOTHING) + target * self.SMOOTHING
+        self.limit = max(float(self.minimum), min(float(self.maximum), limit))
+
+
+class ConcurrencyLimiter:
+    """In-flight limit and bounded FIFO wait queue for one route class, on a single event loop"""
+
+    def __init__(self, name: str, config: RouteClass):
+        self.name = name
+        self.config = config
+        self.limit = GradientLimit(config.initial_limit, config.min_limit, config.max_limit)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        metrics.set_gauge("concurrency_limit", config.initial_limit, route_class=name)
+
+    async def acquire(self) -> Optional[str]:
+        """Take a slot, waiting in the queue if needed. Returns None, or the reason the request is shed."""
+        if self.in_flight < int(self.limit.limit) and not self._waiters:
+            self._started()
+            return None
+        if len(self._waiters) >= self.config.max_queue:
+            return "queue_full"
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            with metrics.timed("queue"):
+                await asyncio.wait_for(waiter, self.config.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            return "queue_timeout"
+        except BaseException:
+            # The client went away while waiting
+            self._abandon(waiter)
+            raise
+        return None
+
+    def _started(self) -> None:
+        self.in_flight += 1
+        metrics.set_gauge("concurrency_in_flight", self.in_flight, route_class=self.name)
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just as the wait ended; pass it on
+            self._finished()
+        else:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self, latency: float) -> None:
+        """Give back a slot, recording how long its request took"""
+        self.limit.update(latency, self.in_flight)
+        metrics.set_gauge("concurrency_limit", int(self.limit.limit), route_class=self.name)
+        self._finished()
+
+    def _finished(self) -> None:
+        self.in_flight -= 1
+        # Hand free slots straight to the oldest waiters, so new arrivals cannot overtake them
+        while self._waiters and self.in_flight < int(self.limit.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self.in_flight += 1
+        metrics.set_gauge("concurrency_in_flight", self.in_flight, route_class=self.name)
+
+
+class LoadSheddingMiddleware:
+    """Admit each request through its route class's ConcurrencyLimiter, answering 503 when it is shed"""
+
+    BODY = b"Service temporarily overloaded, please retry shortly.\n"
+
+    def __init__(self, app: ASGIApp, route_classes: Dict[str, RouteClass] = ROUTE_CLASSES, enabled: bool = LOAD_SHEDDING):
+        self.app = app
+        self.enabled = enabled
+        self.limiters = {name: ConcurrencyLimiter(name, config) for name, config in route_classes.items()}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = None
+        if self.enabled and scope["type"] == "http":
+            limiter = self.limiters.get(route_class(scope))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        reason = await limiter.acquire()
+        if reason is not None:
+            metrics.inc("load_shed_total", route_class=limiter.name, reason=reason)
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(self.BODY)).encode()),
+                    (b"retry-after", str(limiter.config.retry_after).encode()),
+                    (b"cache-control", b"no-store"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": self.BODY})
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - start)
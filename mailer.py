@@ -0,0 +1,233 @@
+"""Asynchronous, pooled SMTP delivery for the contact form.
+
+smtplib is blocking, so every SMTP round-trip runs in a worker thread and the
+request handlers only append submissions to the durable contact spool, which a
+background worker drains in batches over a single SMTP session. Connections
+are kept open between messages, health-checked with NOOP before reuse, and
+replaced (which re-authenticates) when they go idle for too long or fail.
+"""
+import asyncio
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import metrics
+from contact_spool import ContactSpool, Submission
+
+
+def build_message(sender: str, recipient: str, subject: str, body: str, reply_to: Optional[str] = None) -> MIMEMultipart:
+    """Build a plain-text email message"""
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    if reply_to:
+        msg['Reply-To'] = reply_to
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of authenticated SMTP connections"""
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 starttls: bool = True, size: int = 2, idle_timeout: float = 60.0, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        # Idle connections with the time they were last used, most recent last
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                conn.starttls()
+            if self.username and self.password:
+                conn.login(self.username, self.password)
+        except Exception:
+            self._discard(conn)
+            raise
+        return conn
+
+    @staticmethod
+    def _discard(conn: smtplib.SMTP) -> None:
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+    @staticmethod
+    def _is_healthy(conn: smtplib.SMTP) -> bool:
+        try:
+            return conn.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    def _take_idle(self) -> Optional[smtplib.SMTP]:
+        """Pop the most recently used idle connection that is still usable"""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, last_used = self._idle.pop()
+            if now - last_used > self.idle_timeout or not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+            return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """Check out a healthy connection, returning it to the pool afterwards.
+        A connection is dropped instead of returned if the block raises.
+        """
+        self._slots.acquire()
+        try:
+            conn = self._take_idle() or self._connect()
+            try:
+                yield conn
+            except Exception:
+                self._discard(conn)
+                raise
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+class SpoolDeliveryWorker:
+    """Drain the contact spool in batches over one pooled SMTP session, off the event loop"""
+
+    def __init__(self, pool: SMTPConnectionPool, spool: ContactSpool, compose: Callable[[Submission], MIMEMultipart],
+                 batch_size: int = 20, poll_interval: float = 30.0, max_attempts: int = 8,
+                 retry_base: float = 30.0, retry_max: float = 3600.0):
+        self.pool = pool
+        self.spool = spool
+        self.compose = compose
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start draining on the running event loop"""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def notify(self) -> None:
+        """Wake the worker because a new submission was spooled"""
+        self.start()
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Stop the worker; undelivered submissions stay in the spool for the next run"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await asyncio.to_thread(self.pool.close)
+
+    def _retry_at(self, attempts: int) -> Optional[float]:
+        """Exponential backoff for the given number of attempts so far, or None to give up"""
+        if attempts >= self.max_attempts:
+            return None
+        return time.time() + min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+
+    def _fail(self, submission: Submission, error: str) -> None:
+        attempts = submission.attempts + 1
+        retry_at = self._retry_at(attempts)
+        self.spool.mark_failed(submission.id, error, retry_at)
+        metrics.inc("email_deliveries_total", result="failed" if retry_at is not None else "gave_up")
+        if retry_at is None:
+            print(f"EMAIL ERROR: Giving up on submission {submission.id} after {attempts} attempts: {error}")
+        else:
+            print(f"EMAIL ERROR: Submission {submission.id} failed (attempt {attempts}), will retry: {error}")
+
+    def deliver_batch(self) -> int:
+        """Claim and send one batch over a single SMTP connection. Returns the batch size."""
+        batch = self.spool.claim_batch(self.batch_size)
+        if batch:
+            self._send(batch)
+        return len(batch)
+
+    def deliver(self, submission_id: int) -> Optional[str]:
+        """Claim and send one submission. Returns None once it is sent, otherwise the error."""
+        submission = self.spool.claim(submission_id)
+        if submission is None:
+            return f"Submission {submission_id} is not waiting for delivery"
+        self._send([submission])
+        # A sent submission is deleted; one still in the spool failed this attempt
+        return self.spool.last_error(submission_id)
+
+    def _send(self, batch: List[Submission]) -> None:
+        """Send claimed submissions over a single SMTP connection, recording each outcome in the spool"""
+        remaining = list(batch)
+        try:
+            with self.pool.connection() as conn:
+                while remaining:
+                    submission = remaining[0]
+                    try:
+                        start = time.perf_counter()
+                        conn.send_message(self.compose(submission))
+                        metrics.observe("phase_duration_seconds", time.perf_counter() - start, phase="smtp")
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                        # Rejected message; the connection itself is still usable
+                        self._fail(submission, f"SMTP error occurred: {str(e)}")
+                    else:
+                        self.spool.mark_sent(submission.id)
+                        metrics.inc("email_deliveries_total", result="sent")
+                        print(f"SUCCESS: Email for submission {submission.id} from {submission.email} sent successfully")
+                    remaining.pop(0)
+        except smtplib.SMTPAuthenticationError as e:
+            error = f"Email authentication failed. Please check your Gmail App Password. - {str(e)}"
+            for submission in remaining:
+                self._fail(submission, error)
+        except Exception as e:
+            error = f"Error sending email: {str(e)}"
+            for submission in remaining:
+                self._fail(submission, error)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self.deliver_batch)
+            except Exception as e:
+                print(f"EMAIL ERROR: Contact spool unavailable: {str(e)}")
+                claimed = 0
+            if claimed >= self.batch_size:
+                continue  # More submissions are probably waiting
+            timeout = self.poll_interval
+            next_due = await asyncio.to_thread(self.spool.next_due)
+            if next_due is not None:
+                timeout = min(max(next_due - time.time(), 0.0), self.poll_interval)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
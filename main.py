@@ -1,72 +1,177 @@
-from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi import FastAPI, Request, Form, HTTPException, Query
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.routing import APIRoute
+from dataclasses import asdict
 from datetime import datetime
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import urllib.request
-import urllib.parse
-import json
+from urllib.parse import urlencode
+import anyio
 import os
 import re
-import random
 import hashlib
 import time
 import hmac
 import secrets
-from typing import Optional, Tuple
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+from contextlib import asynccontextmanager
 
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-
-from portfolio_data import get_projects, get_static_about_data, get_experience
+from portfolio_data import get_data_mtime, get_data_version, get_project, get_projects, get_static_about_data, get_experience
+import page_cache
+import early_hints
+from load_shedding import LoadSheddingMiddleware
+from assets import asset_url, build_version, critical_css_path, has_asset, inline_css, picture
+from static_files import AssetStaticFiles, accepted_encodings
+from middleware import EarlyHintsMiddleware, SecurityHeadersMiddleware, TimingMiddleware
+import metrics
+import sitemap
+from project_search import get_index
+from rate_limit import RateLimiter
+from replay_guard import ReplayGuard, submission_digest
+from templating import create_templates, preload_templates, stream_template
 
 if os.getenv("VERCEL") is None:
     from dotenv import load_dotenv
-    load_dotenv()
+    # DOTENV_PATH names another settings file, e.g. /dev/null for none
+    load_dotenv(os.getenv("DOTENV_PATH"))
     print("INFO: Local environment detected. Loaded .env file.")
 else:
     print("INFO: Vercel environment detected. Using system environment variables.")
 
-limiter = Limiter(key_func=get_remote_address)
-app = FastAPI()
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    preload_templates(templates.env)
+    get_index()
+    # A cold start on Vercel answers one request and most pages come from the static export
+    if os.getenv("VERCEL") is None:
+        await warm_pages()
+    # Resume delivering anything a previous run left in the spool
+    if not DELIVER_BEFORE_RESPONSE and os.path.exists(CONTACT_SPOOL_PATH):
+        get_email_worker().start()
+    yield
+    if _email_worker is not None:
+        await _email_worker.stop()
+
+limiter = RateLimiter(storage_uri=os.getenv(
+    "RATELIMIT_STORAGE_URI",
+    # Serverless instances share nothing on disk; point this at Redis to share limits across them
+    "memory://" if os.getenv("VERCEL") else "sqlite:///" + os.path.join("data", "ratelimit.db")
+))
+# Used form tokens and recent submissions, so replays and resubmissions never reach the spool
+replay_guard = ReplayGuard(os.getenv("REPLAY_STORAGE_URI", limiter.storage_uri))
+# A resubmission of the same message from the same address within this many seconds is not sent again
+CONTACT_DEDUPE_TTL = int(os.getenv("CONTACT_DEDUPE_TTL", "86400"))
+app = FastAPI(lifespan=lifespan)
 
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    response = await call_next(request)
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    return response
+app.add_middleware(EarlyHintsMiddleware)
+# Inside the security headers and timing, so shed requests get both
+app.add_middleware(LoadSheddingMiddleware)
+app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(TimingMiddleware)
 
 # Email configuration - Set these as environment variables or update directly
 SMTP_SERVER = os.getenv("SMTP_SERVER")
-SMTP_PORT = int(os.getenv("SMTP_PORT"))
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
 SMTP_USERNAME = os.getenv("SMTP_USERNAME")  # Your email
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")  # Your Gmail App Password (set as environment variable)
 RECIPIENT_EMAIL = os.getenv("RECIPIENT_EMAIL")  # Where to receive contact form emails
 SECRET_KEY = os.getenv("SECRET_KEY", secrets.token_hex(32))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # When set, /metrics requires "Authorization: Bearer <token>"
+# Without a token /metrics is only served locally; on Vercel it would be public
+METRICS_ENABLED = bool(METRICS_TOKEN) or os.getenv("VERCEL") is None
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() != "false"  # Disable for local test servers
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))
 
+# Submissions are written to a local spool and delivered by a background worker,
+# so a slow or unavailable SMTP relay never blocks or loses a contact request
+CONTACT_SPOOL_PATH = os.getenv(
+    "CONTACT_SPOOL_PATH",
+    "/tmp/contact_spool.db" if os.getenv("VERCEL") else os.path.join("data", "contact_spool.db")
+)
+# A serverless function is frozen once it responds, so a background worker may never run:
+# there the request delivers the spool itself and reports a failed send, without retries
+DELIVER_BEFORE_RESPONSE = os.getenv("VERCEL") is not None
 # Serve static files (CSS, JS, images)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", AssetStaticFiles(directory="static"), name="static")
 
 # Templates
-templates = Jinja2Templates(directory="templates")
+templates = create_templates()
 
-@app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request):
+# Read-only pages: browsers always revalidate (cheap 304s via ETag), the Vercel edge
+# caches for an hour and may serve a stale copy for a day while it revalidates
+PAGE_CACHE_CONTROL = os.getenv(
+    "PAGE_CACHE_CONTROL", "public, max-age=0, s-maxage=3600, stale-while-revalidate=86400"
+)
+templates.env.globals["picture"] = picture
+templates.env.globals["asset_url"] = asset_url
+templates.env.globals["has_asset"] = has_asset
+templates.env.globals["inline_css"] = inline_css
+templates.env.globals["critical_css_path"] = critical_css_path
+# Inline the above-the-fold CSS from `python build.py css` and load the full stylesheet async
+templates.env.globals["inline_critical_css"] = os.getenv("INLINE_CRITICAL_CSS", "false").lower() == "true"
+# Part of every page's cache key and ETag, so flipping either setting never answers 304 with old markup
+page_cache.render_settings.update(
+    inline_critical_css=templates.env.globals["inline_critical_css"],
+    minify_html=templates.env.minify_html,
+)
+# {% cache %} fragments read the portfolio data and asset URLs; drop them all when either changes
+templates.env.fragment_cache_version = lambda: f"{get_data_version()}:{build_version()}"
+# Stream uncached pages while they render instead of buffering the whole body first
+STREAM_PAGES = os.getenv("STREAM_PAGES", "true").lower() == "true"
+
+async def _stream_and_store(route: str, key: str, template_name: str, context: dict, store: bool) -> AsyncIterator[bytes]:
+    """Stream a page as it renders, then store the complete body in the page cache.
+    Chunks render on the event loop, as buffered pages do, rather than on a worker thread.
+    """
+    chunks = []
+    with metrics.timed("render"):
+        for chunk in stream_template(templates.env, template_name, context):
+            chunks.append(chunk)
+            yield chunk
+    if store:
+        body = b"".join(chunks)
+        page_cache.store_page(route, key, body)
+        early_hints.record(route, body)
+
+def render_cached_page(request: Request, route: str, template_name: str, build_context: Callable[[], dict],
+                       store: bool = True) -> Response:
+    """Serve a read-only page from the rendered-page cache, rendering it on a miss.
+    `build_context` is only called on a miss, so cache hits skip the data layer too,
+    and a matching If-None-Match is answered with 304 without touching the cache at all.
+    With STREAM_PAGES a miss is streamed (head first) while it renders; hits are
+    always sent buffered, since the whole body is already at hand.
+    Pass store=False for open-ended variants such as filtered listings: they still
+    get ETags and 304s but are never kept in the page cache.
+    """
+    key = page_cache.current_key((template_name, "base.html"))
+    headers = {"ETag": page_cache.make_etag(route, key), "Cache-Control": PAGE_CACHE_CONTROL}
+    if page_cache.etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        metrics.inc("page_cache_requests_total", result="not_modified")
+        return Response(status_code=304, headers=headers)
+    body = page_cache.get_page(route, key) if store else None
+    if body is None:
+        metrics.inc("page_cache_requests_total", result="miss")
+        with metrics.timed("data"):
+            context = build_context()
+        context["request"] = request
+        context["year"] = datetime.now().year
+        if STREAM_PAGES:
+            return StreamingResponse(
+                _stream_and_store(route, key, template_name, context, store), media_type="text/html", headers=headers
+            )
+        with metrics.timed("render"):
+            body = templates.TemplateResponse(template_name, context).body
+        if store:
+            page_cache.store_page(route, key, body)
+            early_hints.record(route, body)
+    else:
+        metrics.inc("page_cache_requests_total", result="hit")
+    return HTMLResponse(content=body, headers=headers)
+
+def _index_context() -> dict:
     projects = get_projects()
     experience, total_experience = get_experience()
     skills, expertise, education, certifications = get_static_about_data()
-    
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "year": datetime.now().year,
+    return {
         "projects": projects[:3], # Pass only the first 3 projects
         "experience": experience,
         "total_experience": total_experience,
@@ -74,42 +179,207 @@ async def read_root(request: Request):
         "expertise": expertise,
         "education": education,
         "certifications": certifications
-    })
+    }
 
-@app.get("/about", response_class=HTMLResponse)
-async def about_page(request: Request):
+def _about_context() -> dict:
     experience_data, total_exp = get_experience()
     skills, expertise, education, certifications = get_static_about_data()
-    return templates.TemplateResponse("about.html", {
-        "request": request,
-        "year": datetime.now().year,
+    return {
         "experience": experience_data,
         "total_experience": total_exp,
         "skills": skills,
         "expertise": expertise,
         "education": education,
         "certifications": certifications
-    })
+    }
+
+@app.get("/", response_class=HTMLResponse)
+async def read_root(request: Request):
+    return render_cached_page(request, "/", "index.html", _index_context)
+
+@app.get("/about", response_class=HTMLResponse)
+async def about_page(request: Request):
+    return render_cached_page(request, "/about", "about.html", _about_context)
+
+@app.get("/sitemap.xml", response_class=Response)
+async def sitemap_index(request: Request):
+    return sitemap_response(request, "sitemap.xml")
 
-@app.get("/sitemap.xml", response_class=FileResponse)
-async def sitemap():
-    return FileResponse("static/sitemap.xml", media_type="application/xml")
+@app.get("/sitemap-{shard}.xml", response_class=Response)
+async def sitemap_shard(request: Request, shard: int):
+    return sitemap_response(request, f"sitemap-{shard}.xml")
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics_endpoint(request: Request):
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404)
+    if METRICS_TOKEN and not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401)
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+PROJECTS_PER_PAGE = 10
+
+def _project_filters(q: str, category: Optional[str], tags: List[str]) -> List[Tuple[str, str]]:
+    """Normalize project filters into query string pairs, so equivalent URLs share an ETag"""
+    filters = []
+    if q.strip():
+        filters.append(("q", q.strip()))
+    if category:
+        filters.append(("category", category))
+    filters.extend(("tag", tag) for tag in sorted(set(tags)) if tag)
+    return filters
+
+def _search_projects(filters: List[Tuple[str, str]], page: int, per_page: int):
+    """Run normalized project filters against the search index"""
+    params = dict(filters)
+    tags = [value for name, value in filters if name == "tag"]
+    return get_index().page(params.get("q", ""), params.get("category"), tags, page, per_page)
+
+def _projects_context(filters: List[Tuple[str, str]], page: int) -> dict:
+    index = get_index()
+    params = dict(filters)
+    tags = [value for name, value in filters if name == "tag"]
+    results = _search_projects(filters, page, PROJECTS_PER_PAGE)
+    return {
+        "projects": results.projects,
+        "results": results,
+        "filter_query": filters,
+        "q": params.get("q", ""),
+        "category": params.get("category"),
+        "selected_tags": tags,
+        "categories": index.categories,
+    }
 
 @app.get("/projects", response_class=HTMLResponse)
-async def projects_page(request: Request):
-    projects = get_projects()
-    return templates.TemplateResponse("projects.html", {
-        "request": request,
-        "year": datetime.now().year,
-        "projects": projects
-    })
+async def projects_page(request: Request, q: str = "", category: Optional[str] = None,
+                        tag: List[str] = Query([]), page: int = 1):
+    filters = _project_filters(q, category, tag)
+    page = max(page, 1)
+    if not filters and page == 1:
+        return render_cached_page(request, "/projects", "projects.html", lambda: _projects_context(filters, 1))
+    query = urlencode(filters + ([("page", str(page))] if page > 1 else []))
+    return render_cached_page(
+        request, f"/projects?{query}", "projects.html", lambda: _projects_context(filters, page), store=False
+    )
+
+@app.get("/api/projects")
+async def api_projects(q: str = "", category: Optional[str] = None, tag: List[str] = Query([]),
+                       page: int = Query(1, ge=1), per_page: int = Query(20, ge=1, le=100)):
+    # Normalized as for /projects, so e.g. the "All categories" option (category=) filters nothing
+    results = _search_projects(_project_filters(q, category, tag), page, per_page)
+    return JSONResponse({
+        "total": results.total,
+        "page": results.page,
+        "per_page": results.per_page,
+        "pages": results.pages,
+        "projects": [asdict(project) for project in results.projects],
+    }, headers={"Cache-Control": PAGE_CACHE_CONTROL})
+
+@app.get("/projects/{slug}", response_class=HTMLResponse)
+async def project_page(request: Request, slug: str):
+    project = get_project(slug)
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return render_cached_page(
+        request, f"/projects/{slug}", "project.html",
+        lambda: {"project": project, "title": f"{project.title} | Mahadev Chavan"}
+    )
 
 @app.get("/resources", response_class=HTMLResponse)
 async def resources_page(request: Request):
-    return templates.TemplateResponse("resources.html", {
-        "request": request,
-        "year": datetime.now().year
-    })
+    return render_cached_page(request, "/resources", "resources.html", dict)
+
+# Sitemap metadata per page route: (template, changefreq, priority). Routes not
+# listed still appear in the sitemap, with defaults and the data's lastmod.
+SITEMAP_PAGES = {
+    "/": ("index.html", "weekly", "1.0"),
+    "/about": ("about.html", "monthly", "0.8"),
+    "/projects": ("projects.html", "weekly", "0.9"),
+    "/projects/{slug}": ("project.html", "monthly", "0.7"),
+    "/resources": ("resources.html", "monthly", "0.8"),
+    "/contact": ("contact.html", "yearly", "0.5"),
+}
+SITEMAP_TEMPLATES = ("base.html", *(template for template, _, _ in SITEMAP_PAGES.values()))
+
+# Page routes rendered per request, which the page cache never holds
+UNCACHED_PAGES = {"/contact"}
+
+def page_routes() -> list:
+    """Path templates of the GET routes that serve HTML pages, in registration order"""
+    return [
+        route.path for route in app.routes
+        if isinstance(route, APIRoute) and "GET" in route.methods and route.include_in_schema
+        and isinstance(route.response_class, type) and issubclass(route.response_class, HTMLResponse)
+    ]
+
+def route_paths(route_path: str) -> list:
+    """Concrete URL paths of a GET route, expanding its path parameters"""
+    if route_path == "/projects/{slug}":
+        return [f"/projects/{project.slug}" for project in get_projects()]
+    if route_path == "/sitemap-{shard}.xml":
+        return [f"/{name}" for name in _sitemap_documents() if name != "sitemap.xml"]
+    return [] if "{" in route_path else [route_path]
+
+async def warm_pages() -> None:
+    """Render the top-level cached pages once, filling the page cache and the early hints before the first request.
+    Pages with path parameters (one per project) would make startup grow with the catalogue; they get theirs on first render.
+    """
+    for path in page_routes():
+        if path in UNCACHED_PAGES or "{" in path:
+            continue
+        scope = {
+            "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+            "query_string": b"", "headers": [(b"host", b"localhost")], "client": None,
+            "server": ("localhost", 80), "app": app,
+        }
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            pass
+
+        try:
+            # Straight to the router: a warm-up is not a request to time, limit or hint
+            await app.router(scope, receive, send)
+        except Exception as e:
+            print(f"WARNING: Could not pre-render {path}: {str(e)}")
+
+def _sitemap_entries() -> list:
+    data_mtime = get_data_mtime()
+    entries = []
+    for route_path in page_routes():
+        template, changefreq, priority = SITEMAP_PAGES.get(route_path, (None, "monthly", "0.5"))
+        lastmod = max(
+            [data_mtime] + [page_cache.template_mtime(name) for name in ("base.html", template) if name]
+        )
+        entries.extend(
+            sitemap.SitemapEntry(path, lastmod, changefreq, priority) for path in route_paths(route_path)
+        )
+    return entries
+
+def _sitemap_documents() -> dict:
+    return sitemap.get_documents(page_cache.current_key(SITEMAP_TEMPLATES), _sitemap_entries)
+
+def sitemap_response(request: Request, name: str) -> Response:
+    """Serve a rendered sitemap document, gzipped when the client accepts it"""
+    document = _sitemap_documents().get(name)
+    if document is None:
+        raise HTTPException(status_code=404)
+    gzipped = "gzip" in accepted_encodings(request.headers.get("accept-encoding", ""))
+    headers = {
+        # Each encoding is a different representation, so it gets its own strong ETag
+        "ETag": document.etag[:-1] + '-gzip"' if gzipped else document.etag,
+        "Cache-Control": PAGE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if page_cache.etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        return Response(document.gzipped, media_type="application/xml", headers=headers)
+    return Response(document.body, media_type="application/xml", headers=headers)
 
 # Simple email validation function
 def is_valid_email(email: str) -> bool:
@@ -117,12 +387,16 @@ def is_valid_email(email: str) -> bool:
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
 
+SECURITY_TOKEN_MAX_AGE = 3600
+
 def generate_security_token() -> str:
     """Generate a signed timestamp token for the form"""
     timestamp = str(int(time.time()))
-    # Create a signature of the timestamp using the secret key
-    signature = hmac.new(SECRET_KEY.encode(), timestamp.encode(), hashlib.sha256).hexdigest()
-    return f"{timestamp}:{signature}"
+    # A random nonce makes every token unique, so each one can be accepted only once
+    nonce = secrets.token_urlsafe(12)
+    # Create a signature of the timestamp and nonce using the secret key
+    signature = hmac.new(SECRET_KEY.encode(), f"{timestamp}:{nonce}".encode(), hashlib.sha256).hexdigest()
+    return f"{timestamp}:{nonce}:{signature}"
 
 def verify_security_token(token: str, honeypot: Optional[str]) -> Tuple[bool, str]:
     """Verify honeypot is empty and form wasn't submitted too quickly"""
@@ -131,11 +405,11 @@ def verify_security_token(token: str, honeypot: Optional[str]) -> Tuple[bool, st
         return False, "Spam detected (honeypot)."
     
     try:
-        timestamp_str, signature = token.split(':')
+        timestamp_str, nonce, signature = token.split(':')
         timestamp = int(timestamp_str)
         
         # 2. Verify Signature
-        expected_signature = hmac.new(SECRET_KEY.encode(), timestamp_str.encode(), hashlib.sha256).hexdigest()
+        expected_signature = hmac.new(SECRET_KEY.encode(), f"{timestamp_str}:{nonce}".encode(), hashlib.sha256).hexdigest()
         if not hmac.compare_digest(signature, expected_signature):
             return False, "Invalid security token."
             
@@ -145,33 +419,21 @@ def verify_security_token(token: str, honeypot: Optional[str]) -> Tuple[bool, st
             return False, "Form submitted too quickly. Please wait a moment."
             
         # 4. Enforce Token Expiration (Expire after 1 hour)
-        if current_time - timestamp > 3600:
+        if current_time - timestamp > SECURITY_TOKEN_MAX_AGE:
             return False, "Security token expired. Please refresh the page."
             
         return True, None
     except (ValueError, AttributeError):
         return False, "Invalid token format."
 
-def send_email(name: str, email: str, subject: str, message: str) -> Tuple[bool, str]:
-    """Send email using SMTP
-    Returns: (success: bool, error_message: str)
-    """
-    # Check if email is configured
-    if not SMTP_PASSWORD or SMTP_PASSWORD == "":
-        error_msg = "Email service not configured. Please set SMTP_PASSWORD environment variable with your Gmail App Password."
-        print(f"EMAIL ERROR: {error_msg}")
-        return False, error_msg
+def compose_contact_email(submission):
+    """Build the notification email for a spooled contact submission"""
+    from mailer import build_message
     
-    try:
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = SMTP_USERNAME
-        msg['To'] = RECIPIENT_EMAIL
-        msg['Subject'] = f"Portfolio Contact Form: {subject}"
-        msg['Reply-To'] = email
-        
-        # Email body
-        body = f"""
+    name, email, subject, message = submission.name, submission.email, submission.subject, submission.message
+    
+    # Email body
+    body = f"""
 New contact form submission from your portfolio website:
 
 Name: {name}
@@ -185,31 +447,75 @@ Message:
 This email was sent from your portfolio contact form.
 You can reply directly to this email to respond to {name} at {email}
         """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Send email
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SMTP_USERNAME, SMTP_PASSWORD)
-        text = msg.as_string()
-        server.sendmail(SMTP_USERNAME, RECIPIENT_EMAIL, text)
-        server.quit()
-        
-        print(f"SUCCESS: Email sent successfully from {email} to {RECIPIENT_EMAIL}")
-        return True, ""
-    except smtplib.SMTPAuthenticationError as e:
-        error_msg = "Email authentication failed. Please check your Gmail App Password."
-        print(f"EMAIL ERROR: {error_msg} - {str(e)}")
+    
+    return build_message(SMTP_USERNAME, RECIPIENT_EMAIL, f"Portfolio Contact Form: {subject}", body, reply_to=email)
+
+# Created on first use so cold starts that only serve pages never import smtplib, email or sqlite3
+_email_worker = None
+
+def get_email_worker():
+    """Return the spool delivery worker, creating it on first use"""
+    global _email_worker
+    if _email_worker is None:
+        from contact_spool import ContactSpool
+        from mailer import SMTPConnectionPool, SpoolDeliveryWorker
+        _email_worker = SpoolDeliveryWorker(
+            SMTPConnectionPool(
+                SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD,
+                starttls=SMTP_STARTTLS, size=SMTP_POOL_SIZE, idle_timeout=SMTP_IDLE_TIMEOUT
+            ),
+            ContactSpool(CONTACT_SPOOL_PATH),
+            compose_contact_email,
+            max_attempts=1 if DELIVER_BEFORE_RESPONSE else 8
+        )
+    return _email_worker
+
+async def send_email(name: str, email: str, subject: str, message: str) -> Tuple[bool, str]:
+    """Spool the contact email; the background worker delivers it over SMTP,
+    or with DELIVER_BEFORE_RESPONSE it is delivered before this returns
+    Returns: (accepted: bool, error_message: str)
+    """
+    # Check if email is configured
+    if not SMTP_PASSWORD or SMTP_PASSWORD == "":
+        error_msg = "Email service not configured. Please set SMTP_PASSWORD environment variable with your Gmail App Password."
+        print(f"EMAIL ERROR: {error_msg}")
         return False, error_msg
-    except smtplib.SMTPException as e:
-        error_msg = f"SMTP error occurred: {str(e)}"
+    
+    email_worker = get_email_worker()
+    try:
+        submission_id = await anyio.to_thread.run_sync(email_worker.spool.append, name, email, subject, message)
+    except Exception as e:
+        error_msg = f"Error saving your message: {str(e)}"
         print(f"EMAIL ERROR: {error_msg}")
         return False, error_msg
+    
+    if not DELIVER_BEFORE_RESPONSE:
+        email_worker.notify()
+        print(f"INFO: Submission {submission_id} from {email} spooled for delivery to {RECIPIENT_EMAIL}")
+        return True, ""
+    
+    # Only this request's own submission: one claimed by a concurrent request may still fail
+    try:
+        error_msg = await anyio.to_thread.run_sync(email_worker.deliver, submission_id)
     except Exception as e:
         error_msg = f"Error sending email: {str(e)}"
+    if error_msg:
         print(f"EMAIL ERROR: {error_msg}")
         return False, error_msg
+    return True, ""
+
+def check_replay(form_token: str, digest: str) -> Tuple[bool, bool]:
+    """Claim the form token and the submission digest
+    Returns: (token_fresh: bool, duplicate: bool)
+    Blocking: shared storages wait on a lock or the network, so call it on a worker thread
+    """
+    token_fresh = replay_guard.claim("token", form_token, SECURITY_TOKEN_MAX_AGE)
+    if token_fresh:
+        duplicate = not replay_guard.claim("submission", digest, CONTACT_DEDUPE_TTL)
+    else:
+        # A double-submitted form replays its token with the message it already delivered
+        duplicate = replay_guard.seen("submission", digest)
+    return token_fresh, duplicate
 
 @app.get("/contact", response_class=HTMLResponse)
 async def contact_page(request: Request, success: Optional[str] = None, error: Optional[str] = None):
@@ -253,7 +559,8 @@ async def submit_contact(
             })
             
         # Verify Invisible Security (Honeypot + Time)
-        is_secure, security_msg = verify_security_token(form_token, website_hp)
+        with metrics.timed("token"):
+            is_secure, security_msg = verify_security_token(form_token, website_hp)
         if not is_secure:
             new_token = generate_security_token()
             return templates.TemplateResponse("contact.html", {
@@ -275,17 +582,48 @@ async def submit_contact(
         clean_subject = subject.strip()
         clean_message = message.strip()
         
+        # Each token is accepted once, and a message already received is not sent again
+        digest = submission_digest(clean_email, clean_subject, clean_message)
+        with metrics.timed("replay"):
+            token_fresh, duplicate = await anyio.to_thread.run_sync(check_replay, form_token, digest)
+        if duplicate:
+            metrics.inc("contact_sends_saved_total", reason="duplicate")
+            print(f"INFO: Duplicate submission from {clean_email} not sent again")
+            return RedirectResponse(
+                url="/contact?success=Thank you for your message! I'll get back to you soon.",
+                status_code=303
+            )
+        if not token_fresh:
+            metrics.inc("contact_sends_saved_total", reason="replay")
+            return templates.TemplateResponse("contact.html", {
+                "request": request,
+                "year": datetime.now().year,
+                "error": "This form was already submitted. Please refresh the page.",
+                "form_token": generate_security_token(),
+                "form_data": {
+                    "name": name,
+                    "email": email,
+                    "subject": subject,
+                    "message": message
+                }
+            })
+        
         # Send email
-        email_sent, email_error = send_email(
-            name=clean_name,
-            email=clean_email,
-            subject=clean_subject,
-            message=clean_message
-        )
+        with metrics.timed("spool"):
+            email_sent, email_error = await send_email(
+                name=clean_name,
+                email=clean_email,
+                subject=clean_subject,
+                message=clean_message
+            )
+        
+        if not email_sent:
+            # Nothing was sent, so the same message may be submitted again
+            await anyio.to_thread.run_sync(replay_guard.release, "submission", digest)
         
         if email_sent:
             return RedirectResponse(
-                url=f"/contact?success=Thank you for your message! I'll get back to you soon.",
+                url="/contact?success=Thank you for your message! I'll get back to you soon.",
                 status_code=303
             )
         else:
@@ -306,6 +644,8 @@ async def submit_contact(
             })
             
     except Exception as e:
+        print(f"ERROR: Unexpected error handling contact form: {str(e)}")
+        metrics.inc("errors_total", where="submit_contact")
         new_token = generate_security_token()
         return templates.TemplateResponse("contact.html", {
             "request": request,
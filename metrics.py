@@ -0,0 +1,152 @@
+"""Request timing instrumentation, exposed as Server-Timing headers and Prometheus text.
+
+TimingMiddleware (see middleware.py) opens a sampling scope per request. Code
+inside a request wraps its expensive phases in `timed("render")` etc.; each
+phase is recorded in a latency histogram and listed in that response's
+Server-Timing header. Counters such as cache hits or rate-limit rejections
+are always recorded, latencies only for sampled requests: with
+METRICS_SAMPLE_RATE below 1.0 an unsampled request costs little more than a
+counter increment.
+"""
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Fraction of requests whose latencies are recorded (1.0 = all, 0.0 = none)
+SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "1.0"))
+
+# Latency buckets in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# name -> (type, help)
+_METRICS = {
+    "http_requests_total": ("counter", "HTTP requests by route, method and status"),
+    "http_request_duration_seconds": ("histogram", "Latency of sampled HTTP requests by route"),
+    "phase_duration_seconds": ("histogram", "Latency of request and background phases (render, data, token, smtp, ...)"),
+    "page_cache_requests_total": ("counter", "Page route lookups by result (hit, miss, not_modified)"),
+    "fragment_cache_requests_total": ("counter", "Template fragment cache lookups by result (hit, miss)"),
+    "rate_limit_rejections_total": ("counter", "Requests rejected by the rate limiter by endpoint"),
+    "contact_sends_saved_total": ("counter", "Contact emails not spooled because the form replayed a used token or duplicated a recent message, by reason"),
+    "email_deliveries_total": ("counter", "Contact email delivery attempts by result"),
+    "errors_total": ("counter", "Unexpected errors by location"),
+    "load_shed_total": ("counter", "Requests answered 503 by the concurrency limiter, by route class and reason (queue_full, queue_timeout)"),
+    "concurrency_limit": ("gauge", "Current adaptive in-flight limit by route class"),
+    "concurrency_in_flight": ("gauge", "Requests being handled by route class"),
+}
+
+_counters: Dict[Tuple[str, Labels], float] = {}
+_gauges: Dict[Tuple[str, Labels], float] = {}
+# (name, labels) -> [bucket counts..., +Inf count, sum]
+_histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+# Phases recorded for the current request, or None when it is not sampled
+_request_phases: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_phases", default=None)
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def inc(name: str, amount: float = 1, **labels: str) -> None:
+    """Increment a counter"""
+    key = (name, _labels(labels))
+    _counters[key] = _counters.get(key, 0) + amount
+
+
+def set_gauge(name: str, value: float, **labels: str) -> None:
+    """Set a gauge to its current value"""
+    _gauges[(name, _labels(labels))] = value
+
+
+def observe(name: str, seconds: float, **labels: str) -> None:
+    """Record a latency in a histogram"""
+    key = (name, _labels(labels))
+    series = _histograms.get(key)
+    if series is None:
+        series = _histograms[key] = [0] * (len(BUCKETS) + 2)
+    for i, bound in enumerate(BUCKETS):
+        if seconds <= bound:
+            series[i] += 1
+            break
+    else:
+        series[len(BUCKETS)] += 1
+    series[-1] += seconds
+
+
+def start_request() -> bool:
+    """Decide whether the current request is sampled and start collecting its phases"""
+    sampled = SAMPLE_RATE >= 1.0 or random.random() < SAMPLE_RATE
+    _request_phases.set([] if sampled else None)
+    return sampled
+
+
+def request_phases() -> List[Tuple[str, float]]:
+    """Phases recorded so far for the current request"""
+    return _request_phases.get() or []
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Time a phase of the current request if it is sampled"""
+    phases = _request_phases.get()
+    if phases is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        phases.append((phase, elapsed))
+        observe("phase_duration_seconds", elapsed, phase=phase)
+
+
+def server_timing(total: Optional[float] = None) -> str:
+    """Format the current request's phases as a Server-Timing header value"""
+    entries = [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in request_phases()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    # Full precision: "%g" would round counters past 999999 to 6 significant digits
+    return repr(float(value))
+
+
+def render_prometheus() -> str:
+    """Render every metric in the Prometheus text exposition format"""
+    lines = []
+    for name, (kind, help_text) in _METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind in ("counter", "gauge"):
+            for (metric, labels), value in sorted((_counters if kind == "counter" else _gauges).items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        else:
+            for (metric, labels), series in sorted(_histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, series):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', f'{bound:g}'),))} {cumulative}")
+                cumulative += series[len(BUCKETS)]
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(series[-1])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
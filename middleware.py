@@ -0,0 +1,110 @@
+"""Pure ASGI middleware for the app.
+
+Unlike `@app.middleware("http")` (Starlette's BaseHTTPMiddleware), these never
+wrap the response in an extra task and memory stream: they only look at the
+`http.response.start` message on its way out, so streaming and file responses
+pass through untouched and the per-request overhead stays minimal.
+"""
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import early_hints
+import metrics
+
+
+class SecurityHeadersMiddleware:
+    """Add the security headers to every HTTP response"""
+
+    HEADERS = {
+        "X-Frame-Options": "DENY",
+        "X-Content-Type-Options": "nosniff",
+        "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+    }
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in self.HEADERS.items():
+                    headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def route_label(scope: Scope) -> str:
+    """Label a request by its route template rather than its raw path, to keep metric cardinality bounded"""
+    route = scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+    if scope.get("root_path", "").endswith("/static") or scope["path"].startswith("/static/"):
+        return "/static"
+    return "unmatched"
+
+
+class TimingMiddleware:
+    """Record per-route latency and send the request's phases as a Server-Timing header"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sampled = metrics.start_request()
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if sampled:
+                    MutableHeaders(scope=message)["Server-Timing"] = metrics.server_timing(time.perf_counter() - start)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = route_label(scope)
+            metrics.inc("http_requests_total", route=route, method=scope["method"], status=str(status))
+            if sampled:
+                metrics.observe("http_request_duration_seconds", time.perf_counter() - start, route=route)
+
+
+class EarlyHintsMiddleware:
+    """Send recorded preload links as 103 Early Hints (when the server supports it) and a Link header"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Hints are recorded per cached page; a query (e.g. a filtered project list) may show other images
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD") or scope.get("query_string"):
+            await self.app(scope, receive, send)
+            return
+
+        links = early_hints.links_for(scope["path"])
+        if links and "http.response.early_hint" in scope.get("extensions", {}):
+            await send({"type": "http.response.early_hint", "links": [link.encode() for link in links]})
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                # Pages rendered by this very request are recorded by now unless they are still streaming
+                final_links = links or early_hints.links_for(scope["path"])
+                if final_links:
+                    MutableHeaders(scope=message).append("Link", ", ".join(final_links))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,86 @@
+"""In-memory cache of fully rendered pages for the read-only routes.
+
+Rendered HTML bytes are stored per route together with the key they were
+rendered under. The key combines the portfolio data version, the asset build,
+the settings that change the markup (`render_settings`), the modification
+times of the templates involved and the current year and month, so an entry
+silently goes stale when the data, a setting or a template changes or the month
+rolls over (which changes the experience durations and the footer year).
+
+The same key doubles as the page's content version for ETags, so a
+conditional GET can be answered with 304 before anything is rendered.
+"""
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from assets import build_version
+from portfolio_data import get_data_version
+
+TEMPLATES_DIR = "templates"
+
+# route -> (key, rendered body)
+_pages: Dict[str, Tuple[str, bytes]] = {}
+
+# Settings the rendered HTML depends on, e.g. {"minify_html": True}; filled in by main.py
+render_settings: Dict[str, object] = {}
+
+
+def template_mtime(name: str) -> float:
+    """Modification time of a template, as a Unix timestamp"""
+    return os.path.getmtime(os.path.join(TEMPLATES_DIR, name))
+
+
+def template_version(template_names: Iterable[str]) -> str:
+    """Combine the modification times of the given templates"""
+    return "-".join(
+        str(os.stat(os.path.join(TEMPLATES_DIR, name)).st_mtime_ns) for name in template_names
+    )
+
+
+def settings_version() -> str:
+    """Short digest of render_settings"""
+    return hashlib.sha256(repr(sorted(render_settings.items())).encode()).hexdigest()[:8]
+
+
+def current_key(template_names: Iterable[str] = ()) -> str:
+    """Build the cache key for the current data version, asset build, settings, templates and month"""
+    now = datetime.now()
+    return (
+        f"{get_data_version()}:{build_version()}:{settings_version()}:{template_version(template_names)}:"
+        f"{now.year}-{now.month:02d}"
+    )
+
+
+def make_etag(route: str, key: str) -> str:
+    """Strong ETag for a route rendered under `key`"""
+    return '"' + hashlib.sha256(f"{route}|{key}".encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def get_page(route: str, key: str) -> Optional[bytes]:
+    """Return the cached body for a route if it was rendered under `key`"""
+    entry = _pages.get(route)
+    if entry is not None and entry[0] == key:
+        return entry[1]
+    return None
+
+
+def store_page(route: str, key: str, body: bytes) -> None:
+    """Store the rendered body for a route, replacing any stale entry"""
+    _pages[route] = (key, body)
+
+
+def clear() -> None:
+    """Drop every cached page"""
+    _pages.clear()
@@ -1,329 +1,215 @@
-from datetime import datetime
+from dataclasses import dataclass, replace
+from datetime import date, datetime
+from typing import Dict, NamedTuple, Optional, Tuple
+import os
+import re
+import threading
+
+from content_store import ContentStore
+
+# Site content lives in YAML and Markdown files under content/ (see content_store)
+CONTENT_DIR = os.getenv("CONTENT_DIR", "content")
+# Seconds between checks for edited content files; 0 loads them once. Deployments
+# on Vercel are immutable, so they never need to look again.
+CONTENT_RELOAD_INTERVAL = float(os.getenv("CONTENT_RELOAD_INTERVAL", "0" if os.getenv("VERCEL") else "2"))
+# Parsed content written by `python build.py content`, used for files whose digest matches
+CONTENT_CACHE = os.getenv("CONTENT_CACHE", ".content_cache.json")
+
+
+# The content files are parsed into frozen, slotted records that are shared by
+# every request; templates only read them.
+
+@dataclass(frozen=True, slots=True)
+class Tag:
+    name: str
+    css_class: str
+
+
+@dataclass(frozen=True, slots=True)
+class Link:
+    text: str
+    url: str
+    css_class: str
+
+
+@dataclass(frozen=True, slots=True)
+class Project:
+    title: str
+    slug: str
+    category: str
+    cat_class: str
+    desc: str
+    image: str
+    icon: str
+    gradient: str
+    tags: Tuple[Tag, ...]
+    links: Tuple[Link, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class SkillCategory:
+    title: str
+    items: Tuple[Tag, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class Education:
+    degree: str
+    school: str
+    year: str
+
+
+@dataclass(frozen=True, slots=True)
+class Certification:
+    name: str
+    issuer: str
+    date: str
+    meta: str
+    border_class: str
+    text_class: str
+    bg_hover: str
+
+
+@dataclass(frozen=True, slots=True)
+class Job:
+    role: str
+    company: str
+    period: str
+    start_date: date
+    end_date: Optional[date]  # None while the job is current
+    mode: str
+    desc: str
+    duration: str = ""  # Filled in per month by get_experience()
+
+
+def _slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def _project(data):
+    return Project(
+        title=data['title'],
+        slug=_slugify(data['title']),
+        category=data['category'],
+        cat_class=data['cat_class'],
+        desc=data['desc'],
+        image=data['image'],
+        icon=data['icon'],
+        gradient=data['gradient'],
+        tags=tuple(Tag(tag['name'], tag['class']) for tag in data['tags']),
+        links=tuple(Link(link['text'], link['url'], link['class']) for link in data['links']),
+    )
+
+
+def _date(value):
+    """Parse a YAML date, which may arrive as a date or an ISO string"""
+    return value if isinstance(value, date) else datetime.strptime(str(value), "%Y-%m-%d").date()
+
+
+def _job(document):
+    meta = document.meta
+    end_date = meta.get('end_date')
+    return Job(
+        role=meta['role'],
+        company=meta['company'],
+        period=meta['period'],
+        start_date=_date(meta['start_date']),
+        end_date=None if end_date in (None, "Current") else _date(end_date),
+        mode=meta.get('mode') or '',
+        desc=document.html,
+    )
+
+
+class Content(NamedTuple):
+    projects: Tuple[Project, ...]
+    projects_by_slug: Dict[str, Project]
+    about: tuple
+    jobs: Tuple[Job, ...]
+
+
+def _build_content(files):
+    """Turn the parsed content files into the records the site renders"""
+    projects = tuple(_project(data) for data in files['projects.yaml'])
+    about = files['about.yaml']
+    # Jobs are listed in file name order, e.g. experience/01-current-job.md first
+    jobs = tuple(_job(files[name]) for name in sorted(files) if name.startswith('experience/'))
+    return Content(
+        projects=projects,
+        projects_by_slug={project.slug: project for project in projects},
+        about=(
+            tuple(SkillCategory(c['title'], tuple(Tag(i['name'], i['class']) for i in c['items'])) for c in about['skills']),
+            tuple(about['expertise']),
+            tuple(Education(**data) for data in about['education']),
+            tuple(Certification(**data) for data in about['certifications']),
+        ),
+        jobs=jobs,
+    )
+
+
+_store = ContentStore(CONTENT_DIR, _build_content, check_interval=CONTENT_RELOAD_INTERVAL, cache_path=CONTENT_CACHE)
+
+
+def get_data_version():
+    """Return a version string that changes whenever the content or the month changes"""
+    return f"{_store.version()}:{datetime.now().strftime('%Y-%m')}"
+
+
+def get_data_mtime():
+    """Modification time of the most recently edited content file"""
+    return _store.latest_mtime()
+
 
 def get_projects():
-    return [
-      {
-        'title': 'Large Language Model Fine-tuning Platform',
-        'category': 'Generative AI',
-        'cat_class': 'bg-green-100 text-green-800',
-        'desc': 'Developed an end-to-end platform for fine-tuning LLMs on custom datasets. Reduced training costs by 40% using LoRA adapters and quantization. The system supports GPT, BERT, and T5 variants with automated evaluation pipelines.',
-        'image': '/static/project_llm.png',
-        'icon': 'fas fa-robot',
-        'gradient': 'from-blue-500 to-purple-600',
-        'tags': [
-          {'name': 'PyTorch', 'class': 'bg-purple-100 text-purple-800'},
-          {'name': 'Transformers', 'class': 'bg-purple-100 text-purple-800'},
-          {'name': 'Hugging Face', 'class': 'bg-purple-100 text-purple-800'},
-          {'name': 'AWS SageMaker', 'class': 'bg-purple-100 text-purple-800'},
-          {'name': 'Docker', 'class': 'bg-purple-100 text-purple-800'}
-        ],
-        'links': [
-          {'text': 'View Code →', 'url': '#', 'class': 'text-green-600 hover:text-green-700'},
-          {'text': 'Read Paper →', 'url': '#', 'class': 'text-blue-600 hover:text-blue-700'}
-        ]
-      },
-      {
-        'title': 'AI-Powered Image Generation System',
-        'category': 'Deep Learning',
-        'cat_class': 'bg-purple-100 text-purple-800',
-        'desc': 'Built a state-of-the-art image generation system using diffusion models and GANs. The system can generate high-quality images from text prompts with fine-grained control over style, composition, and artistic elements. Achieved FID score of 8.5 on benchmark datasets.',
-        'image': '/static/project_image_gen.png',
-        'icon': 'fas fa-palette',
-        'gradient': 'from-green-500 to-teal-600',
-        'tags': [
-          {'name': 'TensorFlow', 'class': 'bg-purple-100 text-purple-800'},
-          {'name': 'Stable Diffusion', 'class': 'bg-purple-100 text-purple-800'},
-          {'name': 'GANs', 'class': 'bg-purple-100 text-purple-800'},
-          {'name': 'CUDA', 'class': 'bg-purple-100 text-purple-800'},
-          {'name': 'Flask API', 'class': 'bg-purple-100 text-purple-800'}
-        ],
-        'links': [
-          {'text': 'View Code →', 'url': '#', 'class': 'text-green-600 hover:text-green-700'},
-          {'text': 'Live Demo →', 'url': '#', 'class': 'text-blue-600 hover:text-blue-700'}
-        ]
-      },
-      {
-        'title': 'Real-time Predictive Analytics Platform',
-        'category': 'Machine Learning',
-        'cat_class': 'bg-green-100 text-green-800',
-        'desc': 'Designed a scalable ML platform processing 50k+ events per second with sub-10ms latency. The system leverages distributed computing for real-time predictions and includes an automated retraining framework that improved model freshness by 200%.',
-        'image': '/static/project_analytics.png',
-        'icon': 'fas fa-chart-line',
-        'gradient': 'from-green-500 to-blue-600',
-        'tags': [
-          {'name': 'Apache Spark', 'class': 'bg-green-100 text-green-800'},
-          {'name': 'Kafka', 'class': 'bg-green-100 text-green-800'},
-          {'name': 'XGBoost', 'class': 'bg-blue-100 text-blue-800'},
-          {'name': 'Kubernetes', 'class': 'bg-blue-100 text-blue-800'},
-          {'name': 'MLflow', 'class': 'bg-purple-100 text-purple-800'}
-        ],
-        'links': [
-          {'text': 'View Code →', 'url': '#', 'class': 'text-green-600 hover:text-green-700'},
-          {'text': 'Case Study →', 'url': '#', 'class': 'text-blue-600 hover:text-blue-700'}
-        ]
-      },
-      {
-        'title': 'Medical Image Analysis with Deep Learning',
-        'category': 'Computer Vision',
-        'cat_class': 'bg-blue-100 text-blue-800',
-        'desc': 'Developed a deep learning system for automated medical image analysis, achieving 94% diagnostic accuracy. The model uses CNNs and attention mechanisms to detect anomalies, reducing manual review time for radiologists by approximately 30%.',
-        'image': '/static/project_medical.png',
-        'icon': 'fas fa-microscope',
-        'gradient': 'from-blue-500 to-purple-600',
-        'tags': [
-          {'name': 'PyTorch', 'class': 'bg-blue-100 text-blue-800'},
-          {'name': 'ResNet', 'class': 'bg-blue-100 text-blue-800'},
-          {'name': 'Vision Transformers', 'class': 'bg-purple-100 text-purple-800'},
-          {'name': 'DICOM', 'class': 'bg-purple-100 text-purple-800'},
-          {'name': 'Grad-CAM', 'class': 'bg-purple-100 text-purple-800'}
-        ],
-        'links': [
-          {'text': 'View Code →', 'url': '#', 'class': 'text-blue-600 hover:text-blue-700'},
-          {'text': 'Research Paper →', 'url': '#', 'class': 'text-purple-600 hover:text-purple-700'}
-        ]
-      },
-      {
-        'title': 'Intelligent Conversational AI Assistant',
-        'category': 'NLP',
-        'cat_class': 'bg-pink-100 text-pink-800',
-        'desc': 'Created an advanced conversational AI system using RAG (Retrieval-Augmented Generation). The assistant handles multi-turn conversations with context retention, reducing customer support ticket volume by 45% in pilot testing.',
-        'image': '/static/project_chat.png',
-        'icon': 'fas fa-comments',
-        'gradient': 'from-purple-500 to-rose-600',
-        'tags': [
-          {'name': 'LangChain', 'class': 'bg-pink-100 text-pink-800'},
-          {'name': 'OpenAI GPT', 'class': 'bg-pink-100 text-pink-800'},
-          {'name': 'Vector DB', 'class': 'bg-pink-100 text-pink-800'},
-          {'name': 'FastAPI', 'class': 'bg-pink-100 text-pink-800'},
-          {'name': 'Redis', 'class': 'bg-pink-100 text-pink-800'}
-        ],
-        'links': [
-          {'text': 'View Code →', 'url': '#', 'class': 'text-green-600 hover:text-green-700'},
-          {'text': 'Try Demo →', 'url': '#', 'class': 'text-blue-600 hover:text-blue-700'}
-        ]
-      }
-    ]
+    return _store.get().projects
+
+
+def get_project(slug):
+    """Return the project with the given URL slug, or None"""
+    return _store.get().projects_by_slug.get(slug)
+
 
 def get_static_about_data():
-    skills = [
-      {
-        'title': 'Programming Languages',
-        'items': [
-          {'name': 'Python', 'class': 'bg-emerald-100 text-emerald-700'},
-          {'name': 'R', 'class': 'bg-emerald-100 text-emerald-700'},
-          {'name': 'SQL', 'class': 'bg-emerald-100 text-emerald-700'},
-          {'name': 'Scala', 'class': 'bg-emerald-100 text-emerald-700'}
-        ]
-      },
-      {
-        'title': 'ML/DL Frameworks',
-        'items': [
-          {'name': 'TensorFlow', 'class': 'bg-sky-100 text-sky-700'},
-          {'name': 'PyTorch', 'class': 'bg-sky-100 text-sky-700'},
-          {'name': 'Keras', 'class': 'bg-sky-100 text-sky-700'},
-          {'name': 'Scikit-learn', 'class': 'bg-sky-100 text-sky-700'}
-        ]
-      },
-      {
-        'title': 'Generative AI',
-        'items': [
-          {'name': 'Transformers', 'class': 'bg-violet-100 text-violet-700'},
-          {'name': 'Hugging Face', 'class': 'bg-violet-100 text-violet-700'},
-          {'name': 'LangChain', 'class': 'bg-violet-100 text-violet-700'},
-          {'name': 'OpenAI API', 'class': 'bg-violet-100 text-violet-700'}
-        ]
-      },
-      {
-        'title': 'Tools & Technologies',
-        'items': [
-          {'name': 'Docker', 'class': 'bg-emerald-100 text-emerald-700'},
-          {'name': 'Kubernetes', 'class': 'bg-emerald-100 text-emerald-700'},
-          {'name': 'MLflow', 'class': 'bg-sky-100 text-sky-700'},
-          {'name': 'Airflow', 'class': 'bg-sky-100 text-sky-700'},
-          {'name': 'AWS/GCP', 'class': 'bg-violet-100 text-violet-700'}
-        ]
-      }
-    ]
-    
-    expertise = [
-      'Neural Networks & Deep Learning Architectures',
-      'Large Language Models (LLMs) & Fine-tuning',
-      'Computer Vision & Image Generation',
-      'Natural Language Processing (NLP)',
-      'Model Training, Optimization & MLOps',
-      'Production ML System Design'
-    ]
-    
-    education = [
-      {'degree': 'Diploma of Education, Artificial Intelligence and Machine Learning', 'school': 'University of Hyderabad', 'year': '2021 - 2022'},
-      {'degree': 'Master of Science in Computer Science', 'school': 'Savitribai Phule Pune University', 'year': '2018 - 2020'},
-      {'degree': 'Bachelor of Science in Computer Science', 'school': 'Savitribai Phule Pune University', 'year': '2015 - 2018'}
-    ]
-    
-    certifications = [
-      {
-          'name': 'Generative AI with Large Language Models', 
-          'issuer': 'Coursera', 
-          'date': 'August 28, 2025', 
-          'meta': 'Credential ID • 2PT7EW8G5857', 
-          'border_class': 'border-emerald-600',
-          'text_class': 'text-emerald-600',
-          'bg_hover': 'hover:bg-emerald-50'
-      },
-      {
-          'name': 'Fundamental course in the AWS Machine Learning Scholarship!', 
-          'issuer': 'Udacity', 
-          'date': 'Aug 2020', 
-          'meta': 'Issue Date • Aug 2020', 
-          'border_class': 'border-sky-600',
-          'text_class': 'text-sky-600',
-          'bg_hover': 'hover:bg-sky-50'
-      },
-      {
-          'name': 'Microsoft Technology Associate: Windows Server Administration Fundamentals (MTA)', 
-          'issuer': 'Microsoft', 
-          'date': 'Jun 2019', 
-          'meta': 'Issue Date • Jun 2019', 
-          'border_class': 'border-violet-600',
-          'text_class': 'text-violet-600',
-          'bg_hover': 'hover:bg-violet-50'
-      }
-    ]
-    
-    return skills, expertise, education, certifications
-
-
-# Compute experience once instead of every function call
-_cached_experience = None
-_cached_total_experience = None
-_last_calc_date = None
+    return _store.get().about
 
-def get_experience():
-    global _cached_experience, _cached_total_experience, _last_calc_date
-    
-    # Update cache if it"s a new month to avoid recalculating on every request
-    current_month = datetime.now().strftime("%Y-%m")
-    if _last_calc_date == current_month and _cached_experience:
-        return _cached_experience, _cached_total_experience
-
-    experience = [
-      {
-        'role': 'Data Science Engineer',
-        'company': 'KSolves India Limited, Pune',
-        'period': 'April 2024 - Present',
-        'start_date': '2024-04-01',
-        'end_date': 'Current',
-        'mode': 'Hybrid Mode',
-        'desc': """
-<ul class="list-disc pl-4 space-y-4 mt-2">
-    <li>
-        <span class="font-bold text-gray-900">ML-Powered Automation (Salesforce):</span> Engineered an end-to-end machine learning ticket routing system integrated with Salesforce. Designed custom feature engineering logic to evaluate ticket complexity, resolution trends, and engineer efficiency.
-        <div class="mt-1 text-emerald-700 font-medium text-sm">Impact: Achieved a ~60% reduction in manual intervention, drastically improving service response times and customer satisfaction.</div>
-    </li>
-    <li>
-        <span class="font-bold text-gray-900">NLP & Search Systems:</span> Built an automated backend system using Python, Pandas, and advanced NLP (similarity search) to precisely match customer requirements with relevant inventory materials.
-        <div class="mt-1 text-emerald-700 font-medium text-sm">Impact: Streamlined material quantity estimation, reducing manual effort by ~75% while increasing decision accuracy.</div>
-    </li>
-    <li>
-        <span class="font-bold text-gray-900">Computer Vision Solutions:</span> Developed a real-time Computer Vision POC for applicant monitoring. Leveraged facial landmarks, gaze estimation, and geometric analysis to track eye movement and attention during coding assessments.
-    </li>
-    <li>
-        <span class="font-bold text-gray-900">Predictive Analytics:</span> Built and deployed an AI-powered predictive maintenance model for enterprise HVAC systems, enabling proactive monitoring and significant operational efficiency improvements for the client.
-    </li>
-    <li>
-        <span class="font-bold text-gray-900">MLOps & Deployment:</span> Collaborated across teams to deploy, maintain, and scale production-ready AI solutions using Docker and custom data ingestion pipelines (XML-RPC APIs).
-    </li>
-</ul>
-<div class="mt-4 flex flex-wrap gap-2 border-t border-gray-100 pt-3">
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">Salesforce</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">ML Automation</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">NLP</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">Python</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">Computer Vision</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">Predictive Analytics</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">MLOps</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">Docker</span>
-</div>
-"""
-      },
-      {
-        'role': 'Trainee Engineer',
-        'company': 'Neosoft Technologies',
-        'period': 'May 2022 - January 2023',
-        'start_date': '2022-05-01',
-        'end_date': '2023-01-31',
-        'mode': '',
-        'desc': """
-<ul class="list-disc pl-4 space-y-4 mt-2">
-    <li>
-        Conducted comprehensive exploratory data analysis (EDA) using Pandas, SQL, and Matplotlib to extract actionable business insights.
-    </li>
-    <li>
-        Developed and trained Computer Vision models for image processing tasks, utilizing OpenCV and CNN architectures.
-    </li>
-    <li>
-        Supported the end-to-end machine learning lifecycle, from initial data preparation to model training and performance evaluation.
-    </li>
-</ul>
-<div class="mt-4 flex flex-wrap gap-2 border-t border-gray-100 pt-3">
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">EDA</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">Pandas</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">SQL</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">Computer Vision</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">OpenCV</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">CNN</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">ML Lifecycle</span>
-</div>
-"""
-      },
-      {
-        'role': 'Data Science Intern',
-        'company': 'Sciffer Analytics Pte Ltd',
-        'period': 'May 2021 - Aug 2021',
-        'start_date': '2021-05-01',
-        'end_date': '2021-08-31',
-        'mode': 'Remote',
-        'desc': """
-<ul class="list-disc pl-4 space-y-4 mt-2">
-    <li>
-        Sourced, curated, and annotated large-scale, complex datasets to directly support the training of Computer Vision models.
-    </li>
-    <li>
-        Supervised a 5-person data annotation team during interim periods, ensuring workflow continuity, task delegation, and strict data quality standards.
-    </li>
-</ul>
-<div class="mt-4 flex flex-wrap gap-2 border-t border-gray-100 pt-3">
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">Data Annotation</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">Computer Vision</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">Team Supervision</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">Data Quality</span>
-    <span class="bg-gray-100 text-gray-800 text-xs px-2 py-1 rounded font-semibold">Workflow Management</span>
-</div>
-"""
-      }
-    ]
-    
+
+def _format_months(months):
+    years = months // 12
+    rem_months = months % 12
+    return f"{years}.{rem_months} years" if years > 0 else f"{rem_months} months"
+
+
+def _compute_experience(jobs, today):
+    """Fill in job durations and the total experience as of `today`"""
+    experience = []
     total_months = 0
-    for job in experience:
-        start = datetime.strptime(job['start_date'], "%Y-%m-%d")
-        if job['end_date'] == "Current":
-            end = datetime.now()
-        else:
-            end = datetime.strptime(job['end_date'], "%Y-%m-%d")
-            
-        months = (end.year - start.year) * 12 + (end.month - start.month) + 1
+    for job in jobs:
+        end = job.end_date or today
+        months = (end.year - job.start_date.year) * 12 + (end.month - job.start_date.month) + 1
         total_months += months
-        
-        years = months // 12
-        rem_months = months % 12
-        job['duration'] = f"{years}.{rem_months} years" if years > 0 else f"{rem_months} months"
-            
+        experience.append(replace(job, duration=_format_months(months)))
+
     total_years = total_months // 12
     total_rem_months = total_months % 12
-    total_exp = f"{total_years}.{total_rem_months} years"
-    
-    _cached_experience = experience
-    _cached_total_experience = total_exp
-    _last_calc_date = current_month
-    
-    return experience, total_exp
+    return tuple(experience), f"{total_years}.{total_rem_months} years"
+
+
+# Durations only change when the month (or the content) does, so they are computed
+# once per data version. Readers take the current snapshot without locking; a
+# rebuild swaps in a new tuple.
+_experience_snapshot = (None, (), "")
+_experience_lock = threading.Lock()
+
+
+def get_experience():
+    global _experience_snapshot
+
+    version = get_data_version()
+    cached_version, experience, total_exp = _experience_snapshot
+    if cached_version == version:
+        return experience, total_exp
+
+    with _experience_lock:
+        if _experience_snapshot[0] != version:
+            experience, total_exp = _compute_experience(_store.get().jobs, datetime.now().date())
+            _experience_snapshot = (version, experience, total_exp)
+        return _experience_snapshot[1], _experience_snapshot[2]
@@ -0,0 +1,110 @@
+"""Search and filtering over the project catalogue, backed by an inverted index.
+
+The index maps every word of a project's title, description, category and
+tag names to the catalogue positions of the projects containing it, plus
+exact-match maps for categories and tags. A lookup intersects a few
+precomputed sets instead of scanning every project, so it stays well under a
+millisecond for thousands of projects. Results keep catalogue order.
+
+`get_index()` builds the index once and rebuilds it only when the portfolio
+data version changes.
+"""
+import re
+import threading
+from bisect import bisect_left
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from portfolio_data import Project, get_data_version, get_projects
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class SearchResult(NamedTuple):
+    projects: Tuple[Project, ...]
+    total: int
+    page: int
+    per_page: int
+
+    @property
+    def pages(self) -> int:
+        return max((self.total + self.per_page - 1) // self.per_page, 1)
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+class ProjectIndex:
+    """Inverted index over a fixed sequence of projects"""
+
+    def __init__(self, projects: Sequence[Project]):
+        self.projects = tuple(projects)
+        terms: Dict[str, set] = {}
+        categories: Dict[str, set] = {}
+        tags: Dict[str, set] = {}
+        for position, project in enumerate(self.projects):
+            text = " ".join([project.title, project.desc, project.category, *(tag.name for tag in project.tags)])
+            for term in tokenize(text):
+                terms.setdefault(term, set()).add(position)
+            categories.setdefault(project.category.lower(), set()).add(position)
+            for tag in project.tags:
+                tags.setdefault(tag.name.lower(), set()).add(position)
+        self._terms: Dict[str, FrozenSet[int]] = {term: frozenset(p) for term, p in terms.items()}
+        self._vocabulary = sorted(self._terms)
+        self._categories = {name: frozenset(p) for name, p in categories.items()}
+        self._tags = {name: frozenset(p) for name, p in tags.items()}
+        self._all = frozenset(range(len(self.projects)))
+        # Display names in catalogue order, for filter controls
+        self.categories = tuple(dict.fromkeys(project.category for project in self.projects))
+        self.tags = tuple(dict.fromkeys(tag.name for project in self.projects for tag in project.tags))
+
+    def _prefix_matches(self, prefix: str) -> FrozenSet[int]:
+        """Projects containing any word that starts with `prefix`"""
+        matches = set()
+        i = bisect_left(self._vocabulary, prefix)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(prefix):
+            matches |= self._terms[self._vocabulary[i]]
+            i += 1
+        return frozenset(matches)
+
+    def search(self, query: str = "", category: Optional[str] = None, tags: Iterable[str] = ()) -> List[int]:
+        """Positions of the projects matching every query word, the category and every tag.
+        The last query word also matches as a prefix, so partial input finds results.
+        """
+        candidates = [] if category is None else [self._categories.get(category.lower(), frozenset())]
+        candidates.extend(self._tags.get(tag.lower(), frozenset()) for tag in tags)
+        words = tokenize(query)
+        if words:
+            candidates.extend(self._terms.get(word, frozenset()) for word in words[:-1])
+            candidates.append(self._prefix_matches(words[-1]))
+        if not candidates:
+            return list(range(len(self.projects)))
+        candidates.sort(key=len)
+        matches = candidates[0].intersection(*candidates[1:])
+        return sorted(matches)
+
+    def page(self, query: str = "", category: Optional[str] = None, tags: Iterable[str] = (),
+             page: int = 1, per_page: int = 10) -> SearchResult:
+        """Search and return one page of matching projects"""
+        positions = self.search(query, category, tags)
+        start = (page - 1) * per_page
+        projects = tuple(self.projects[i] for i in positions[start:start + per_page])
+        return SearchResult(projects, len(positions), page, per_page)
+
+
+_index: Tuple[Optional[str], Optional[ProjectIndex]] = (None, None)
+_index_lock = threading.Lock()
+
+
+def get_index() -> ProjectIndex:
+    """Return the index of the current projects, rebuilding it when the data version changes"""
+    global _index
+    version = get_data_version()
+    cached_version, index = _index
+    if cached_version != version:
+        with _index_lock:
+            cached_version, index = _index
+            if cached_version != version:
+                index = ProjectIndex(get_projects())
+                _index = (version, index)
+    return index
@@ -0,0 +1,81 @@
+"""Per-client rate limiting for expensive endpoints.
+
+Limits are enforced with a moving (sliding) window in a `limits` storage chosen
+by URI: ``memory://`` for a single process, ``sqlite:///path`` (see
+rate_limit_storage) for several workers on one host, or ``redis://host:port``
+for any Redis-compatible server shared by several instances (needs the
+`redis` package).
+
+The `limits` package is imported on the first rate-limited request rather than
+at startup, so cold starts that only serve pages never pay for it. Storage calls
+run on a worker thread: the SQLite storage may wait seconds for its write lock
+when several workers contend for it, and Redis waits on the network.
+"""
+import functools
+import threading
+import time
+from typing import Callable
+
+import anyio
+from fastapi import HTTPException, Request
+
+import metrics
+
+
+def get_remote_address(request: Request) -> str:
+    """Identify the client by IP address"""
+    return request.client.host if request.client else "127.0.0.1"
+
+
+class RateLimiter:
+    """Moving-window limiter backed by a `limits` storage URI (default: in-process memory)"""
+
+    def __init__(self, key_func: Callable[[Request], str] = get_remote_address, storage_uri: str = "memory://"):
+        self.key_func = key_func
+        self.storage_uri = storage_uri
+        self._strategy = None
+        self._lock = threading.Lock()
+
+    def _get_strategy(self):
+        # Worker threads may race to create it, and two memory storages would split the counts
+        with self._lock:
+            if self._strategy is None:
+                from limits.storage import storage_from_string
+                from limits.strategies import MovingWindowRateLimiter
+
+                import rate_limit_storage  # noqa: F401 - registers the sqlite:// scheme
+
+                self._strategy = MovingWindowRateLimiter(storage_from_string(self.storage_uri))
+        return self._strategy
+
+    def _hit(self, item, name: str, key: str) -> tuple:
+        """Count a hit; returns (allowed, reset time of the window)"""
+        strategy = self._get_strategy()
+        if strategy.hit(item, name, key):
+            return True, None
+        return False, strategy.get_window_stats(item, name, key).reset_time
+
+    def limit(self, limit_value: str):
+        """Decorate an endpoint taking a `request: Request` argument, e.g. @limiter.limit("3/minute")"""
+        def decorator(func):
+            item = None
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                nonlocal item
+                if item is None:
+                    from limits import parse
+                    item = parse(limit_value)
+                key = self.key_func(kwargs["request"])
+                allowed, reset_at = await anyio.to_thread.run_sync(self._hit, item, func.__name__, key)
+                if not allowed:
+                    metrics.inc("rate_limit_rejections_total", endpoint=func.__name__)
+                    raise HTTPException(
+                        status_code=429,
+                        detail=f"Rate limit exceeded: {item}",
+                        headers={"Retry-After": str(max(int(reset_at - time.time()), 1))},
+                    )
+                return await func(*args, **kwargs)
+
+            return wrapper
+        return decorator
@@ -0,0 +1,159 @@
+"""SQLite storage backend for `limits`, shared by every worker process on a host.
+
+Importing this module registers the ``sqlite://`` scheme, so a limiter can be
+pointed at it with e.g. ``RATELIMIT_STORAGE_URI=sqlite:///data/ratelimit.db``
+(three slashes for a relative path, four for an absolute one). It supports the
+moving (sliding) window strategy and the fixed window one. Each check is a
+single short write transaction on a WAL-mode database.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from limits.storage import MovingWindowSupport, Storage
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT NOT NULL,
+    ts REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_key_ts ON entries (key, ts);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+"""
+
+# Expired rows of idle keys are purged every this many writes
+_PURGE_EVERY = 1000
+
+
+class SQLiteStorage(Storage, MovingWindowSupport):
+    """Rate limit storage in a local SQLite database"""
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri.split("://", 1)[1][1:] or ":memory:"
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes = 0
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _write(self, operation):
+        """Run `operation(conn, now)` in an immediate transaction, so concurrent workers serialize"""
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = operation(conn, now)
+                self._writes += 1
+                if self._writes % _PURGE_EVERY == 0:
+                    conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+                    conn.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return result
+
+    # Fixed window counters
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        def operation(conn, now):
+            conn.execute(
+                "INSERT INTO counters (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "value = CASE WHEN expires_at <= ? THEN excluded.value ELSE value + excluded.value END, "
+                "expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END",
+                (key, amount, now + expiry, now, now),
+            )
+            return conn.execute("SELECT value FROM counters WHERE key = ?", (key,)).fetchone()[0]
+
+        return self._write(operation)
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM counters WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT expires_at FROM counters WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else time.time()
+
+    # Moving window entries
+
+    def acquire_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+
+        def operation(conn, now):
+            conn.execute("DELETE FROM entries WHERE key = ? AND ts <= ?", (key, now - expiry))
+            count = conn.execute("SELECT COUNT(*) FROM entries WHERE key = ?", (key,)).fetchone()[0]
+            if count + amount > limit:
+                return False
+            conn.executemany(
+                "INSERT INTO entries (key, ts, expires_at) VALUES (?, ?, ?)",
+                [(key, now, now + expiry)] * amount,
+            )
+            return True
+
+        return self._write(operation)
+
+    def get_moving_window(self, key: str, limit: int, expiry: int) -> tuple:
+        now = time.time()
+        with self._lock:
+            oldest, count = self._connection().execute(
+                "SELECT MIN(ts), COUNT(*) FROM entries WHERE key = ? AND ts > ?", (key, now - expiry)
+            ).fetchone()
+        return (oldest if count else now), count
+
+    # Maintenance
+
+    def check(self) -> bool:
+        try:
+            with self._lock:
+                self._connection().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int:
+        def operation(conn, now):
+            removed = conn.execute("DELETE FROM entries").rowcount
+            return removed + conn.execute("DELETE FROM counters").rowcount
+
+        return self._write(operation)
+
+    def clear(self, key: str) -> None:
+        def operation(conn, now):
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.execute("DELETE FROM counters WHERE key = ?", (key,))
+
+        self._write(operation)
@@ -0,0 +1,118 @@
+"""One-time claims on form tokens and submission contents.
+
+A signed form token stays valid for an hour, and POST /contact used to accept
+it every time within that hour. A claim remembers a key for a TTL, and only
+the first claim of a key succeeds. The contact form claims the token, so a
+replay is rejected. It also claims a digest of the message, so a resubmission
+is answered without spooling another email. Both checks are a single
+set-if-absent before anything is sent.
+
+Claims live in a storage chosen by URI, like the rate limiter's:
+``memory://`` keeps a bounded in-process table (MAX_ENTRIES, expired entries
+evicted first, then the oldest); ``sqlite:///path`` shares claims between the
+workers on one host (see rate_limit_storage); ``redis://host:port`` shares them
+between instances. The last two go through a `limits` storage, whose
+fixed-window counter acts as the claim: the first increment of a key returns 1.
+Their calls block on a lock or the network, so callers on an event loop should
+run them on a worker thread.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+MAX_ENTRIES = int(os.getenv("REPLAY_GUARD_MAX_ENTRIES", "100000"))
+
+
+class MemoryClaims:
+    """Bounded, TTL-evicting claim table for a single process"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()  # key -> expires at, oldest claim first
+        self._lock = threading.Lock()
+
+    def claim(self, key: str, ttl: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._expiry.get(key)
+            if expires_at is not None and expires_at > now:
+                return False
+            self._expiry.pop(key, None)
+            # Claims share a few TTLs, so expired ones are mostly at the front
+            while self._expiry:
+                oldest, oldest_expiry = next(iter(self._expiry.items()))
+                if oldest_expiry > now and len(self._expiry) < self.max_entries:
+                    break
+                del self._expiry[oldest]
+            self._expiry[key] = now + ttl
+            return True
+
+    def seen(self, key: str) -> bool:
+        expires_at = self._expiry.get(key)
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._expiry.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+
+class StorageClaims:
+    """Claims kept in a `limits` storage, shared by every process using the same URI"""
+
+    def __init__(self, storage_uri: str):
+        from limits.storage import storage_from_string
+
+        import rate_limit_storage  # noqa: F401 - registers the sqlite:// scheme
+
+        self.storage = storage_from_string(storage_uri)
+
+    def claim(self, key: str, ttl: float) -> bool:
+        return self.storage.incr(key, int(ttl)) == 1
+
+    def seen(self, key: str) -> bool:
+        return self.storage.get(key) > 0
+
+    def release(self, key: str) -> None:
+        self.storage.clear(key)
+
+
+class ReplayGuard:
+    """Namespaced one-time claims in the storage named by `storage_uri`"""
+
+    def __init__(self, storage_uri: str = "memory://"):
+        self.storage_uri = storage_uri
+        self._claims = None
+        self._lock = threading.Lock()
+
+    def _get_claims(self):
+        # Called from worker threads, which must not each create their own memory table
+        with self._lock:
+            if self._claims is None:
+                if self.storage_uri.startswith("memory://"):
+                    self._claims = MemoryClaims()
+                else:
+                    self._claims = StorageClaims(self.storage_uri)
+        return self._claims
+
+    def claim(self, namespace: str, value: str, ttl: float) -> bool:
+        """Claim `value` for `ttl` seconds. Returns False if it is already claimed."""
+        return self._get_claims().claim(f"replay/{namespace}/{value}", ttl)
+
+    def seen(self, namespace: str, value: str) -> bool:
+        """Whether `value` is currently claimed"""
+        return self._get_claims().seen(f"replay/{namespace}/{value}")
+
+    def release(self, namespace: str, value: str) -> None:
+        """Drop a claim, e.g. when the work it guarded failed and may be retried"""
+        self._get_claims().release(f"replay/{namespace}/{value}")
+
+
+def submission_digest(email: str, subject: str, message: str) -> str:
+    """Digest identifying a contact submission by sender and content, ignoring case and spacing"""
+    parts = (email.lower(), " ".join(subject.split()).lower(), " ".join(message.split()).lower())
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
@@ -0,0 +1,96 @@
+"""XML sitemap generated from the app's page routes and the portfolio data.
+
+Callers describe each page as a SitemapEntry; `build_documents` renders them
+into /sitemap.xml, or into a sitemap index plus /sitemap-N.xml shards of at
+most MAX_URLS entries once there are more pages than that. Documents are
+rendered once per cache key, so requests only pay for serving bytes: each
+document keeps a strong ETag and a gzipped copy.
+"""
+import gzip
+import hashlib
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from xml.sax.saxutils import escape
+
+SITE_URL = os.getenv("SITE_URL", "https://mahadevchavan.com").rstrip("/")
+# The sitemaps protocol allows up to 50,000 URLs per file
+MAX_URLS = int(os.getenv("SITEMAP_MAX_URLS", "50000"))
+
+_XMLNS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+class SitemapEntry(NamedTuple):
+    path: str
+    lastmod: float  # Unix timestamp
+    changefreq: str = "monthly"
+    priority: str = "0.5"
+
+
+class SitemapDocument(NamedTuple):
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+
+# (key, document name -> document), e.g. "sitemap.xml", "sitemap-1.xml"
+_documents: Tuple[Optional[str], Dict[str, SitemapDocument]] = (None, {})
+
+
+def _w3c_datetime(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds")
+
+
+def _document(xml: str) -> SitemapDocument:
+    body = xml.encode()
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return SitemapDocument(body, gzip.compress(body, mtime=0), etag)
+
+
+def render_urlset(entries: Iterable[SitemapEntry]) -> str:
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<urlset xmlns="{_XMLNS}">']
+    for entry in entries:
+        lines.append(
+            f"  <url>\n"
+            f"    <loc>{escape(SITE_URL + entry.path)}</loc>\n"
+            f"    <lastmod>{_w3c_datetime(entry.lastmod)}</lastmod>\n"
+            f"    <changefreq>{entry.changefreq}</changefreq>\n"
+            f"    <priority>{entry.priority}</priority>\n"
+            f"  </url>"
+        )
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def render_index(shards: List[List[SitemapEntry]]) -> str:
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<sitemapindex xmlns="{_XMLNS}">']
+    for number, shard in enumerate(shards, start=1):
+        lines.append(
+            f"  <sitemap>\n"
+            f"    <loc>{escape(f'{SITE_URL}/sitemap-{number}.xml')}</loc>\n"
+            f"    <lastmod>{_w3c_datetime(max(entry.lastmod for entry in shard))}</lastmod>\n"
+            f"  </sitemap>"
+        )
+    lines.append("</sitemapindex>")
+    return "\n".join(lines) + "\n"
+
+
+def build_documents(entries: List[SitemapEntry], max_urls: int = MAX_URLS) -> Dict[str, SitemapDocument]:
+    """Render the sitemap documents for `entries`, sharding them behind an index when needed"""
+    if len(entries) <= max_urls:
+        return {"sitemap.xml": _document(render_urlset(entries))}
+    shards = [entries[i:i + max_urls] for i in range(0, len(entries), max_urls)]
+    documents = {"sitemap.xml": _document(render_index(shards))}
+    for number, shard in enumerate(shards, start=1):
+        documents[f"sitemap-{number}.xml"] = _document(render_urlset(shard))
+    return documents
+
+
+def get_documents(key: str, build_entries) -> Dict[str, SitemapDocument]:
+    """Return the sitemap documents rendered under `key`, calling `build_entries()` to re-render them on a miss"""
+    global _documents
+    cached_key, documents = _documents
+    if cached_key != key:
+        documents = build_documents(build_entries())
+        _documents = (key, documents)
+    return documents
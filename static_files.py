@@ -0,0 +1,343 @@
+"""Static file serving for the /static mount.
+
+Content-hashed copies produced by `python build.py fingerprint` never change
+under the same name, so they are served with a one-year immutable cache
+lifetime and browsers never revalidate them.
+
+`python build.py compress` writes .br and .gz siblings next to compressible
+files; those are picked by Accept-Encoding negotiation so no CPU is spent
+compressing at request time.
+
+Large files (the resume, the project screenshots) are read with os.pread, in
+256 KiB chunks on a worker thread, from file descriptors kept open between
+requests. Starlette's FileResponse instead opens the file per request and reads
+64 KiB chunks. Stat results are trusted for STAT_CACHE_TTL seconds and
+refreshed on a worker thread, and a descriptor is reopened when its file's
+mtime, size or inode changes. Range and If-Range requests (resumed and partial
+downloads) are answered from the same descriptors. HEAD requests, and servers
+offering the ASGI pathsend extension (which send whole files with sendfile()),
+get FileResponse's own handling.
+"""
+import os
+import re
+import stat
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from mimetypes import guess_type
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, PlainTextResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from assets import HASHED_DIR
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Files at least this large are read from cached descriptors
+LARGE_FILE_SIZE = int(os.getenv("LARGE_FILE_SIZE", str(128 * 1024)))
+# Seconds a file's stat result is reused before the file is checked for changes (0 = every request)
+STAT_CACHE_TTL = float(os.getenv("STAT_CACHE_TTL", "1"))
+# Descriptors kept open, least recently used closed first
+OPEN_FILE_CACHE_SIZE = int(os.getenv("OPEN_FILE_CACHE_SIZE", "32"))
+# Bytes per body message when sending a large file
+READ_CHUNK_SIZE = 256 * 1024
+
+# Content-Encoding -> file suffix, in order of preference
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """Parse an Accept-Encoding header into the codings it allows (q > 0)"""
+    accepted = []
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.append(coding.lower())
+    return accepted
+
+
+# request path under the mount -> file it resolved to
+_lookups: Dict[str, str] = {}
+# file path -> (checked at, stat result or None when the path does not exist)
+_stats: Dict[str, Tuple[float, Optional[os.stat_result]]] = {}
+
+
+def cached_stat(path: str) -> Optional[os.stat_result]:
+    """os.stat(path), or None if it does not exist, reused for STAT_CACHE_TTL seconds.
+    Blocking when the entry is stale: call it on a worker thread.
+    """
+    now = time.monotonic()
+    entry = _stats.get(path)
+    if entry is not None and now - entry[0] < STAT_CACHE_TTL:
+        return entry[1]
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        stat_result = None
+    _stats[path] = (now, stat_result)
+    return stat_result
+
+
+def refresh_stats(paths: Iterable[str]) -> None:
+    """cached_stat() every path, so known_stat() is current; blocking"""
+    for path in paths:
+        cached_stat(path)
+
+
+def stats_are_fresh(paths: Iterable[str]) -> bool:
+    now = time.monotonic()
+    return all(path in _stats and now - _stats[path][0] < STAT_CACHE_TTL for path in paths)
+
+
+def known_stat(path: str) -> Optional[os.stat_result]:
+    """The last stat result of cached_stat(path), however old, without touching the disk"""
+    entry = _stats.get(path)
+    return entry[1] if entry is not None else None
+
+
+_BYTE_RANGE = re.compile(r"^\s*(\d*)\s*-\s*(\d*)\s*$")
+
+
+def parse_byte_ranges(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """Parse a Range header into sorted, merged [start, end) ranges of a file of `size` bytes.
+    Returns None for a header to ignore (not bytes, or malformed) and [] when no range is satisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    ranges = []
+    for part in spec.split(","):
+        match = _BYTE_RANGE.match(part)
+        if match is None or match.groups() == ("", ""):
+            return None
+        first, last = match.groups()
+        if not first:
+            # Suffix range: the last N bytes
+            start, end = max(size - int(last), 0), size
+        else:
+            start, end = int(first), min(int(last) + 1, size) if last else size
+            if last and int(last) < start:
+                return None
+        if start < end:
+            ranges.append((start, end))
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _file_key(stat_result: os.stat_result) -> Tuple[int, int, int]:
+    return stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino
+
+
+class _OpenFile:
+    __slots__ = ("fd", "key", "users", "evicted")
+
+    def __init__(self, fd: int, key: Tuple[int, int, int]):
+        self.fd = fd
+        self.key = key
+        self.users = 0
+        self.evicted = False
+
+
+class OpenFileCache:
+    """LRU of read-only file descriptors, keyed by path and reopened when the file changes.
+    A descriptor is closed once it is evicted and no response is still reading from it.
+    """
+
+    def __init__(self, max_size: int = OPEN_FILE_CACHE_SIZE):
+        self.max_size = max_size
+        self._files: "OrderedDict[str, _OpenFile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def open(self, path: str, stat_result: os.stat_result) -> Iterator[int]:
+        key = _file_key(stat_result)
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is None or entry.key != key:
+                if entry is not None:
+                    self._evict(path)
+                entry = self._files[path] = _OpenFile(os.open(path, os.O_RDONLY), key)
+                while len(self._files) > self.max_size:
+                    self._evict(next(iter(self._files)))
+            self._files.move_to_end(path)
+            entry.users += 1
+        try:
+            yield entry.fd
+        finally:
+            with self._lock:
+                entry.users -= 1
+                if entry.evicted and entry.users == 0:
+                    os.close(entry.fd)
+
+    def _evict(self, path: str) -> None:
+        entry = self._files.pop(path)
+        entry.evicted = True
+        if entry.users == 0:
+            os.close(entry.fd)
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in list(self._files):
+                self._evict(path)
+
+
+open_files = OpenFileCache()
+
+
+class CachedFileResponse(FileResponse):
+    """FileResponse that reads through `open_files` instead of reopening the file for every request"""
+
+    chunk_size = READ_CHUNK_SIZE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        file_size = self.stat_result.st_size
+        if scope["method"].upper() == "HEAD" or "http.response.pathsend" in scope.get("extensions", {}) or file_size == 0:
+            return await super().__call__(scope, receive, send)
+        request_headers = Headers(scope=scope)
+        ranges = None
+        if_range = request_headers.get("if-range")
+        # If-Range names the version a partial download started from; for any other version send it whole
+        if "range" in request_headers and if_range in (None, self.headers.get("etag"), self.headers.get("last-modified")):
+            ranges = parse_byte_ranges(request_headers["range"], file_size)
+        if ranges is None:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await self._send_file(send, 0, file_size)
+        elif not ranges:
+            response = PlainTextResponse(
+                "Range Not Satisfiable", status_code=416, headers={"Content-Range": f"bytes */{file_size}"}
+            )
+            return await response(scope, receive, send)
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.headers["content-range"] = f"bytes {start}-{end - 1}/{file_size}"
+            self.headers["content-length"] = str(end - start)
+            await send({"type": "http.response.start", "status": 206, "headers": self.raw_headers})
+            await self._send_file(send, start, end)
+        else:
+            await self._send_ranges(send, ranges, file_size)
+        if self.background is not None:
+            await self.background()
+
+    async def _send_file(self, send: Send, start: int, end: int, more_body: bool = False) -> None:
+        """Send bytes [start, end) of the file. A file truncated meanwhile ends the body early."""
+        with open_files.open(str(self.path), self.stat_result) as fd:
+            while start < end:
+                # A cold page cache or a slow disk must not stall the event loop
+                chunk = await anyio.to_thread.run_sync(os.pread, fd, min(self.chunk_size, end - start), start)
+                if not chunk:
+                    break
+                start += len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body or start < end})
+        if start < end:
+            raise RuntimeError(f"{self.path} changed while it was being sent")
+
+    async def _send_ranges(self, send: Send, ranges: List[Tuple[int, int]], file_size: int) -> None:
+        """Send a multipart/byteranges body, one part per range"""
+        from secrets import token_hex
+
+        boundary = token_hex(13)
+        _, header_generator = self.generate_multipart(ranges, boundary, file_size, self.headers["content-type"])
+        part_headers = [header_generator(start, end) for start, end in ranges]
+        closing = f"\n--{boundary}--\n".encode("latin-1")
+        # Counted from the parts themselves: generate_multipart's length leaves out a byte of the closing line
+        content_length = sum(len(header) + end - start + 1 for header, (start, end) in zip(part_headers, ranges))
+        # RFC 9110 puts the multipart type in Content-Type (Starlette sends it as Content-Range)
+        self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        self.headers["content-length"] = str(content_length + len(closing))
+        await send({"type": "http.response.start", "status": 206, "headers": self.raw_headers})
+        for header, (start, end) in zip(part_headers, ranges):
+            await send({"type": "http.response.body", "body": header, "more_body": True})
+            await self._send_file(send, start, end, more_body=True)
+            await send({"type": "http.response.body", "body": b"\n", "more_body": True})
+        await send({"type": "http.response.body", "body": closing, "more_body": False})
+
+
+class AssetStaticFiles(StaticFiles):
+    """StaticFiles that marks fingerprinted assets as immutable and serves precompressed siblings"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._hashed_dir = os.path.realpath(HASHED_DIR) + os.sep
+
+    @staticmethod
+    def _precompressed(full_path: str, request_headers: Headers) -> Tuple[bool, Optional[str], Optional[str], Optional[os.stat_result]]:
+        """Find the best precompressed sibling the client accepts.
+        Returns (has_siblings, encoding, path, stat_result); encoding is None for the identity file.
+        """
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        has_siblings = False
+        for encoding, suffix in PRECOMPRESSED:
+            # Refreshed by lookup_path or get_response just before, off the event loop
+            stat_result = known_stat(full_path + suffix)
+            if stat_result is None:
+                continue
+            has_siblings = True
+            # Byte ranges refer to the identity representation, so never mix them with an encoding
+            if encoding in accepted and "range" not in request_headers:
+                return True, encoding, full_path + suffix, stat_result
+        return has_siblings, None, None, None
+
+    @staticmethod
+    def _stat_paths(full_path: str) -> List[str]:
+        """The file and its possible precompressed siblings"""
+        return [full_path] + [full_path + suffix for _, suffix in PRECOMPRESSED]
+
+    def lookup_path(self, path: str) -> Tuple[str, Optional[os.stat_result]]:
+        # Runs on a worker thread (see StaticFiles.get_response)
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is not None:
+            _stats[full_path] = (time.monotonic(), stat_result)
+            _lookups[path] = full_path
+            refresh_stats(self._stat_paths(full_path)[1:])
+        return full_path, stat_result
+
+    async def get_response(self, path: str, scope):
+        # A recently looked-up file is served without another path lookup
+        full_path = _lookups.get(path)
+        if full_path is not None and scope["method"] in ("GET", "HEAD"):
+            paths = self._stat_paths(full_path)
+            if not stats_are_fresh(paths):
+                await anyio.to_thread.run_sync(refresh_stats, paths)
+            stat_result = known_stat(full_path)
+            if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                return self.file_response(full_path, stat_result, scope)
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        has_siblings, encoding, encoded_path, encoded_stat = self._precompressed(full_path, request_headers)
+        if encoding is not None:
+            response = FileResponse(
+                encoded_path, status_code=status_code, stat_result=encoded_stat,
+                media_type=guess_type(full_path)[0] or "text/plain",
+            )
+            response.headers["Content-Encoding"] = encoding
+        elif stat_result.st_size >= LARGE_FILE_SIZE:
+            response = CachedFileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        else:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        if has_siblings:
+            response.headers["Vary"] = "Accept-Encoding"
+        if os.path.realpath(full_path).startswith(self._hashed_dir):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -1,8 +1,12 @@
 /** @type {import('tailwindcss').Config} */
 module.exports = {
-  content: ["./templates/**/*.html", "./static/**/*.js"],
+  // content/ holds class strings such as cat_class, tags[].class, border_class and the experience HTML;
+  // assets.py writes the markup of picture()
+  content: ["./templates/**/*.html", "./static/**/*.js", "./content/**/*.{yaml,yml,json,md}", "./assets.py"],
+  // projects.html builds these from the loop index
+  safelist: [{ pattern: /^delay-(100|200|300|400|500)$/ }],
   theme: {
     extend: {},
   },
   plugins: [],
-}
\ No newline at end of file
+}
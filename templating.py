@@ -0,0 +1,84 @@
+"""Jinja2 environment setup shared by the app and the build steps.
+
+Compiled templates are cached as bytecode in JINJA_CACHE_DIR. `python build.py
+templates` fills that cache ahead of time so a cold start loads bytecode
+instead of parsing and compiling every template on its first use.
+
+Templates can wrap shared, expensive blocks in `{% cache %}` (see
+fragment_cache.py). Their sources are minified before compilation (see
+html_minify.py).
+
+`stream_template` renders incrementally for pages sent while they render:
+the document head goes out first so the browser can start fetching
+stylesheets while the body is still being built.
+"""
+import os
+from typing import Iterator
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache
+
+from fragment_cache import FragmentCacheExtension
+from html_minify import MINIFY_HTML, HtmlMinifyExtension
+
+TEMPLATES_DIR = "templates"
+JINJA_CACHE_DIR = os.getenv("JINJA_CACHE_DIR", ".jinja_cache")
+# Streamed bodies are sent in chunks of at least this many characters after the head
+STREAM_CHUNK_SIZE = 8 * 1024
+
+
+class PrebuiltBytecodeCache(FileSystemBytecodeCache):
+    """Bytecode cache that keeps working when its directory is missing or read-only,
+    as on Vercel where only the prebuilt entries shipped with the deployment exist.
+    """
+
+    def dump_bytecode(self, bucket) -> None:
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+def create_templates() -> Jinja2Templates:
+    """Create the Jinja2Templates used to render every page"""
+    templates = Jinja2Templates(directory=TEMPLATES_DIR)
+    templates.env.add_extension(FragmentCacheExtension)
+    templates.env.add_extension(HtmlMinifyExtension)
+    if os.path.isdir(JINJA_CACHE_DIR):
+        # Bytecode is keyed by the original source, so minified and unminified builds need separate files
+        pattern = "__jinja2_%s.min.cache" if MINIFY_HTML else "__jinja2_%s.cache"
+        templates.env.bytecode_cache = PrebuiltBytecodeCache(JINJA_CACHE_DIR, pattern)
+    return templates
+
+
+def preload_templates(env: Environment) -> int:
+    """Load every template so no request pays for compiling one. Returns the number loaded."""
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def stream_template(env: Environment, name: str, context: dict, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Render a template with Template.generate(), yielding UTF-8 chunks.
+    Everything up to and including </head> is yielded as soon as it is rendered;
+    the rest follows in chunks of about `chunk_size` characters.
+    """
+    buffer = []
+    size = 0
+    head_sent = False
+    for piece in env.get_template(name).generate(context):
+        if not head_sent and "</head>" in piece:
+            head_end = piece.index("</head>") + len("</head>")
+            buffer.append(piece[:head_end])
+            yield "".join(buffer).encode()
+            head_sent = True
+            piece = piece[head_end:]
+            buffer, size = [], 0
+        buffer.append(piece)
+        size += len(piece)
+        if head_sent and size >= chunk_size:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
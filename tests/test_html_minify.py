@@ -0,0 +1,57 @@
+"""minify_html: what it collapses and what it must leave alone."""
+import pytest
+from jinja2 import DictLoader, Environment
+
+from html_minify import HtmlMinifyExtension, minify_html
+
+
+def test_collapses_whitespace_and_drops_comments():
+    html = "<div>\n    <p>Hello   world</p>\n    <!-- note -->\n</div>\n"
+    assert minify_html(html) == "<div><p>Hello world</p></div>"
+
+
+@pytest.mark.parametrize("element", [
+    "<pre>\n  line one\n    line two\n</pre>",
+    "<textarea name=\"message\">\n  keep   this\n</textarea>",
+    "<script>\n  if (a  <  b) {\n    run();  // <!-- not a comment -->\n  }\n</script>",
+    "<style>\n  body  >  p { margin:  0 }\n</style>",
+])
+def test_raw_text_elements_are_unchanged(element):
+    assert minify_html(f"<div>\n  {element}\n</div>") == f"<div>{element}</div>"
+
+
+@pytest.mark.parametrize("jinja", [
+    "{{ user.name  |  title }}",
+    "{% if  items %}",
+    "{{ '<p>  spaced  </p>' }}",
+    "{# a  comment\n   over two lines #}",
+])
+def test_jinja_syntax_is_unchanged(jinja):
+    assert jinja in minify_html(f"<p>\n  {jinja}\n</p>")
+
+
+def test_jinja_in_attributes():
+    html = '<div>\n  <a class="{{ css }}  link"  href="/">Home</a>\n</div>'
+    assert minify_html(html) == '<div><a class="{{ css }} link" href="/">Home</a></div>'
+
+
+def test_conditional_comments_are_kept():
+    comment = "<!--[if lt IE 9]>\n  <script src=\"/html5shiv.js\"></script>\n<![endif]-->"
+    assert minify_html(f"<head>\n  {comment}\n</head>") == f"<head>{comment}</head>"
+
+
+def test_commented_out_template_code_is_kept():
+    comment = "<!-- {{ debug }} -->"
+    assert comment in minify_html(f"<p>{comment}</p>")
+
+
+def test_space_between_inline_elements_is_kept():
+    html = "<p>\n  <a href=\"/\">Home</a>\n  <span>|</span> <strong>About</strong>\n</p>"
+    assert minify_html(html) == "<p><a href=\"/\">Home</a>\n<span>|</span> <strong>About</strong></p>"
+
+
+def test_extension_minifies_template_sources():
+    templates = {"page.html": "<ul>\n{% for item in items %}\n  <li>{{ item }}</li>\n{% endfor %}\n</ul>\n"}
+    env = Environment(loader=DictLoader(templates), extensions=[HtmlMinifyExtension])
+    env.minify_html = True
+    assert env.get_template("page.html").render(items=["a", "b"]) == "<ul><li>a</li><li>b</li></ul>"
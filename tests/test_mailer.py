@@ -0,0 +1,167 @@
+"""SMTPConnectionPool and SpoolDeliveryWorker against a local aiosmtpd server."""
+import smtplib
+import socket
+import time
+
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+from contact_spool import ContactSpool
+from mailer import SMTPConnectionPool, SpoolDeliveryWorker, build_message
+
+
+class Recorder:
+    """aiosmtpd handler counting sessions and logins and keeping delivered messages"""
+
+    def __init__(self):
+        self.sessions = 0
+        self.logins = 0
+        self.messages = []
+        self.noop_status = "250 OK"
+
+    def authenticate(self, server, session, envelope, mechanism, auth_data):
+        self.logins += 1
+        success = auth_data.password == b"secret"
+        # handled=False: let aiosmtpd answer a failed login with 535
+        return AuthResult(success=success, handled=False)
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        # smtplib greets once per connection
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_NOOP(self, server, session, envelope, arg):
+        return self.noop_status
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.content)
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def server():
+    recorder = Recorder()
+    controller = Controller(
+        recorder, hostname="127.0.0.1", port=_free_port(),
+        auth_require_tls=False, authenticator=recorder.authenticate,
+    )
+    controller.start()
+    yield controller, recorder
+    controller.stop()
+
+
+def _pool(controller, **kwargs) -> SMTPConnectionPool:
+    kwargs.setdefault("password", "secret")
+    return SMTPConnectionPool(controller.hostname, controller.port, "user@example.com",
+                              starttls=False, timeout=5, **kwargs)
+
+
+def _message(subject: str = "Hello"):
+    return build_message("user@example.com", "inbox@example.com", subject, "Body")
+
+
+def test_connection_is_reused_without_logging_in_again(server):
+    controller, recorder = server
+    pool = _pool(controller)
+    with pool.connection() as first:
+        first.send_message(_message("one"))
+    with pool.connection() as second:
+        second.send_message(_message("two"))
+    pool.close()
+    assert second is first
+    assert recorder.sessions == 1
+    assert recorder.logins == 1
+    assert len(recorder.messages) == 2
+
+
+def test_idle_connection_is_replaced_and_logs_in_again(server):
+    controller, recorder = server
+    pool = _pool(controller, idle_timeout=0.05)
+    with pool.connection() as first:
+        first.send_message(_message())
+    time.sleep(0.1)
+    with pool.connection() as second:
+        second.send_message(_message())
+    pool.close()
+    assert second is not first
+    assert first.sock is None  # Closed when it was dropped
+    assert recorder.logins == 2
+
+
+def test_connection_failing_noop_is_replaced(server):
+    controller, recorder = server
+    pool = _pool(controller)
+    with pool.connection() as first:
+        pass
+    recorder.noop_status = "421 Service not available"
+    with pool.connection() as second:
+        recorder.noop_status = "250 OK"
+        second.send_message(_message())
+    pool.close()
+    assert second is not first
+    assert first.sock is None
+    assert recorder.logins == 2
+    assert len(recorder.messages) == 1
+
+
+def test_connection_is_discarded_when_the_block_raises(server):
+    controller, recorder = server
+    pool = _pool(controller)
+    with pytest.raises(RuntimeError):
+        with pool.connection() as first:
+            raise RuntimeError("compose failed")
+    assert first.sock is None
+    with pool.connection() as second:
+        second.send_message(_message())
+    pool.close()
+    assert second is not first
+    assert recorder.sessions == 2
+    assert recorder.logins == 2
+
+
+def test_failed_login_is_not_pooled(server):
+    controller, recorder = server
+    pool = _pool(controller, password="wrong")
+    for _ in range(2):
+        with pytest.raises(smtplib.SMTPAuthenticationError):
+            with pool.connection():
+                pass
+    pool.close()
+    # Each attempt opened its own connection and logged in again
+    assert recorder.sessions == 2
+
+
+def test_worker_delivers_a_batch_over_one_connection(server, tmp_path):
+    controller, recorder = server
+    spool = ContactSpool(str(tmp_path / "spool.db"))
+    worker = SpoolDeliveryWorker(
+        _pool(controller), spool,
+        lambda s: build_message("user@example.com", "inbox@example.com", s.subject, s.message),
+    )
+    for i in range(3):
+        spool.append("Name", "sender@example.com", f"Subject {i}", "A message body")
+    assert worker.deliver_batch() == 3
+    worker.pool.close()
+    spool.close()
+    assert recorder.sessions == 1
+    assert recorder.logins == 1
+    assert len(recorder.messages) == 3
+
+
+def test_worker_retries_when_the_relay_is_down(tmp_path):
+    spool = ContactSpool(str(tmp_path / "spool.db"))
+    pool = SMTPConnectionPool("127.0.0.1", _free_port(), starttls=False, timeout=1)
+    worker = SpoolDeliveryWorker(pool, spool, lambda s: _message())
+    spool.append("Name", "sender@example.com", "Subject", "A message body")
+    assert worker.deliver_batch() == 1
+    assert spool.counts() == {"pending": 1}
+    assert spool.next_due() > time.time()
+    spool.close()
@@ -0,0 +1,93 @@
+"""SQLiteStorage as a `limits` backend, on a database under tmp_path."""
+import multiprocessing
+import time
+
+import pytest
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter, MovingWindowRateLimiter
+
+from rate_limit_storage import SQLiteStorage
+
+
+@pytest.fixture
+def uri(tmp_path):
+    return f"sqlite:///{tmp_path}/ratelimit.db"
+
+
+@pytest.fixture
+def storage(uri):
+    return storage_from_string(uri)
+
+
+def test_scheme_is_registered(storage, tmp_path):
+    assert isinstance(storage, SQLiteStorage)
+    assert storage.path == f"{tmp_path}/ratelimit.db"
+    assert storage.check()
+
+
+def test_incr_get_clear(storage):
+    assert storage.get("key") == 0
+    assert storage.incr("key", 60) == 1
+    assert storage.incr("key", 60, amount=2) == 3
+    assert storage.get("key") == 3
+    assert storage.get_expiry("key") > time.time() + 50
+    storage.clear("key")
+    assert storage.get("key") == 0
+    assert storage.incr("key", 60) == 1
+
+
+def test_counter_window_expires(storage):
+    storage.incr("key", 1)
+    storage.incr("key", 1)
+    time.sleep(1.1)
+    assert storage.get("key") == 0
+    # The next increment starts a new window
+    assert storage.incr("key", 60) == 1
+
+
+def test_moving_window(storage):
+    limiter = MovingWindowRateLimiter(storage)
+    item = parse("2/second")
+    assert limiter.hit(item, "key")
+    assert limiter.hit(item, "key")
+    assert not limiter.hit(item, "key")
+    assert limiter.hit(item, "other")
+    assert limiter.get_window_stats(item, "key").remaining == 0
+    time.sleep(1.1)
+    assert limiter.hit(item, "key")
+
+
+def test_fixed_window(storage):
+    limiter = FixedWindowRateLimiter(storage)
+    item = parse("2/minute")
+    assert limiter.hit(item, "key")
+    assert limiter.hit(item, "key")
+    assert not limiter.hit(item, "key")
+
+
+def test_reset(storage):
+    storage.incr("counter", 60)
+    storage.acquire_entry("entry", 5, 60)
+    assert storage.reset() == 2
+    assert storage.get("counter") == 0
+    assert storage.get_moving_window("entry", 5, 60)[1] == 0
+
+
+def _hit_many(uri: str, hits: int, results) -> None:
+    limiter = MovingWindowRateLimiter(storage_from_string(uri))
+    item = parse("50/minute")
+    results.put(sum(limiter.hit(item, "shared") for _ in range(hits)))
+
+
+def test_limits_are_shared_between_processes(uri):
+    # Four workers hitting the same key get 50 hits in total, not 50 each
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [context.Process(target=_hit_many, args=(uri, 30, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    allowed = sum(results.get(timeout=30) for _ in workers)
+    for worker in workers:
+        worker.join()
+    assert allowed == 50
@@ -0,0 +1,78 @@
+"""ReplayGuard claims in process memory and in a SQLite storage shared between instances."""
+import time
+
+import pytest
+
+from replay_guard import MemoryClaims, ReplayGuard, submission_digest
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def guard(request, tmp_path):
+    if request.param == "memory":
+        return ReplayGuard("memory://")
+    return ReplayGuard(f"sqlite:///{tmp_path}/claims.db")
+
+
+def test_claim_succeeds_once(guard):
+    assert guard.claim("token", "abc", 60)
+    assert not guard.claim("token", "abc", 60)
+    assert guard.seen("token", "abc")
+
+
+def test_namespaces_are_separate(guard):
+    assert guard.claim("token", "abc", 60)
+    assert guard.claim("submission", "abc", 60)
+    assert not guard.seen("token", "other")
+
+
+def test_claim_expires(guard):
+    # The SQLite storage counts in whole seconds
+    assert guard.claim("token", "abc", 1)
+    time.sleep(1.1)
+    assert not guard.seen("token", "abc")
+    assert guard.claim("token", "abc", 60)
+
+
+def test_release_after_a_failed_send(guard):
+    digest = submission_digest("a@example.com", "Hello", "A message")
+    assert guard.claim("submission", digest, 60)
+    # The send failed: the same message must be accepted again, once
+    guard.release("submission", digest)
+    assert not guard.seen("submission", digest)
+    assert guard.claim("submission", digest, 60)
+    assert not guard.claim("submission", digest, 60)
+
+
+def test_sqlite_claims_are_shared(tmp_path):
+    uri = f"sqlite:///{tmp_path}/claims.db"
+    first, second = ReplayGuard(uri), ReplayGuard(uri)
+    assert first.claim("token", "abc", 60)
+    assert not second.claim("token", "abc", 60)
+    second.release("token", "abc")
+    assert first.claim("token", "abc", 60)
+
+
+def test_memory_claims_are_bounded():
+    claims = MemoryClaims(max_entries=3)
+    for key in "abcd":
+        assert claims.claim(key, 60)
+    assert len(claims) == 3
+    # The oldest claim made room for the newest
+    assert not claims.seen("a")
+    assert claims.seen("d")
+
+
+def test_memory_claims_evict_expired_entries_first():
+    claims = MemoryClaims(max_entries=10)
+    claims.claim("short", 0.05)
+    claims.claim("long", 60)
+    time.sleep(0.1)
+    claims.claim("new", 60)
+    assert len(claims) == 2
+    assert claims.seen("long")
+
+
+def test_submission_digest_ignores_case_and_spacing():
+    digest = submission_digest("A@Example.com", "Hello  there", "A\nmessage ")
+    assert digest == submission_digest("a@example.com", "hello there", "a message")
+    assert digest != submission_digest("a@example.com", "hello there", "another message")
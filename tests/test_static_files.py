@@ -0,0 +1,109 @@
+"""Range requests against AssetStaticFiles and the descriptor-backed CachedFileResponse."""
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+import static_files
+from static_files import AssetStaticFiles, parse_byte_ranges
+
+DATA = bytes(range(256)) * 1024  # 256 KiB, above LARGE_FILE_SIZE
+
+
+@pytest.mark.parametrize("header, ranges", [
+    ("bytes=0-99", [(0, 100)]),
+    ("bytes=100-", [(100, 1000)]),
+    ("bytes=-100", [(900, 1000)]),
+    ("bytes=-5000", [(0, 1000)]),
+    ("bytes=900-5000", [(900, 1000)]),
+    ("bytes=0-9, 5-19, 500-599", [(0, 20), (500, 600)]),
+    ("bytes=500-599,0-9", [(0, 10), (500, 600)]),
+    ("bytes=10-19,20-29", [(10, 30)]),
+    ("bytes=1000-", []),
+    ("bytes=2000-3000, 1500-", []),
+])
+def test_parse_byte_ranges(header, ranges):
+    assert parse_byte_ranges(header, 1000) == ranges
+
+
+@pytest.mark.parametrize("header", ["items=0-9", "bytes=", "bytes=-", "bytes=a-b", "bytes=20-10", "bytes=0-9,x"])
+def test_parse_byte_ranges_ignores_malformed_headers(header):
+    assert parse_byte_ranges(header, 1000) is None
+
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / "big.bin").write_bytes(DATA)
+    app = Starlette(routes=[Mount("/static", AssetStaticFiles(directory=str(tmp_path)))])
+    yield TestClient(app)
+    static_files.open_files.clear()
+    static_files._lookups.clear()
+    static_files._stats.clear()
+
+
+def test_whole_file(client):
+    response = client.get("/static/big.bin")
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_single_range(client):
+    response = client.get("/static/big.bin", headers={"Range": "bytes=1000-1999"})
+    assert response.status_code == 206
+    assert response.content == DATA[1000:2000]
+    assert response.headers["content-range"] == f"bytes 1000-1999/{len(DATA)}"
+    assert response.headers["content-length"] == "1000"
+
+
+def test_suffix_range(client):
+    response = client.get("/static/big.bin", headers={"Range": "bytes=-10"})
+    assert response.status_code == 206
+    assert response.content == DATA[-10:]
+
+
+def test_unsatisfiable_range(client):
+    response = client.get("/static/big.bin", headers={"Range": f"bytes={len(DATA)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+
+def test_malformed_range_sends_the_whole_file(client):
+    response = client.get("/static/big.bin", headers={"Range": "bytes=oops"})
+    assert response.status_code == 200
+    assert response.content == DATA
+
+
+def test_multiple_ranges(client):
+    response = client.get("/static/big.bin", headers={"Range": "bytes=0-9,100-109,105-119,300000-"})
+    assert response.status_code == 206
+    content_type = response.headers["content-type"]
+    assert content_type.startswith("multipart/byteranges; boundary=")
+    assert int(response.headers["content-length"]) == len(response.content)
+
+    boundary = content_type.split("boundary=")[1].encode()
+    parts = response.content.split(b"--" + boundary)
+    assert parts[-1] == b"--\n"
+    bodies = [part.split(b"\n\n", 1) for part in parts[1:-1]]
+    assert [headers.split(b"Content-Range: ")[1] for headers, _ in bodies] == [
+        f"bytes 0-9/{len(DATA)}".encode(), f"bytes 100-119/{len(DATA)}".encode()
+    ]
+    # Each part ends with a newline, and the closing delimiter starts on a line of its own
+    assert [body for _, body in bodies] == [DATA[0:10] + b"\n", DATA[100:120] + b"\n\n"]
+
+
+def test_if_range(client):
+    etag = client.get("/static/big.bin").headers["etag"]
+    current = client.get("/static/big.bin", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert current.status_code == 206
+    assert current.content == DATA[:10]
+    stale = client.get("/static/big.bin", headers={"Range": "bytes=0-9", "If-Range": '"an-older-version"'})
+    assert stale.status_code == 200
+    assert stale.content == DATA
+
+
+def test_head(client):
+    response = client.head("/static/big.bin")
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(len(DATA))
+    assert response.content == b""